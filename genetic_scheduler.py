@@ -50,13 +50,16 @@
 #######################################################################
 # Imports
 #######################################################################
+import array
 import collections
 import operator
+import os
+import sys
 
 #######################################################################
 # Global variables
 #
-# Heads up with default dict, when process_input_from_solution runs,the
+# Heads up with default dict, when process_schedule_of_classes runs, the
 # values are stored as lists, so you'll see [''] around the actual
 # value, have to reference the 0th element of the list to get value
 #######################################################################
@@ -69,9 +72,59 @@ GD = dict(
     HIGH_SCORE=20000,
     INFO_LEVEL=1,  # see Helper.say()
     ROOM_CAPACITY_WASTE_THRESHOLD_PCT=25,
+    MINUTES_PER_UNIT=50,  # weekly meeting minutes of a lecture per unit
+    ENGINE="GA",  # GA or ANNEALING, or --engine on the command line
+    CROSSOVER_TYPE="RANDOM_SINGLE",  # see crossover(), ADAPTIVE = credit based
+    # Adaptive control, see adapt_operators()
+    ADAPT_DECAY=0.8,  # weight of older generations in the operator credit
+    ADAPT_MIN_PCT=10,  # least chance of each crossover operator, in %
+    ADAPTIVE_MUTATION=False,  # 1/5th success rule on the mutation rate
+    ADAPT_FACTOR=1.25,  # mutation rate step of the 1/5th success rule
+    MUTATION_RATE_MIN=0.5,
+    MUTATION_RATE_MAX=20,
+    # Memetic step, see memetic_search()
+    MEMETIC_PCT=0,  # % of the population to hill climb, 0 = off
+    MEMETIC_BUDGET=500,  # moves tried per generation
+    # Simulated annealing engine, see Annealing.run()
+    ANNEAL_ITERATIONS=20000,  # moves tried
+    ANNEAL_SCHEDULE="GEOMETRIC",  # GEOMETRIC or LINEAR cooling
+    ANNEAL_START_TEMP=None,  # None = calibrated, see get_start_temperature()
+    ANNEAL_END_TEMP=1,
+    TABU_TENURE=0,  # moves a (course, element) left stays tabu, 0 = off
+    FITNESS_CACHE_MB=0,  # memory bound of the fitness cache, 0 = off
+    FITNESS_WORKERS=0,  # processes for fitness() from scratch, 0 or 1 = serial
+    GENERATE_WORKERS=0,  # processes for the initial population, 0 = serial
+    INITIALIZER="DSATUR",  # DSATUR or RANDOM, see construct_solution()
+    SELECTION="TRUNCATION",  # TRUNCATION, TOURNAMENT or RANK, see select()
+    TOURNAMENT_SIZE=3,  # solutions per tournament, larger = more pressure
+    RANK_PRESSURE=1.5,  # expected picks of the best solution, 1.0 to 2.0
+    ELITE_SIZE=2,  # best solutions kept in every generation, see keep_elite()
+    # Early stopping, see check_convergence()
+    STOP_STAGNATION=0,  # generations without a better best, 0 = off
+    STOP_MIN_IMPROVEMENT_PCT=0,  # least % gain of the best over those
+    STOP_TARGET_SCORE=None,  # stop once the best reaches it, None = off
+    STOP_TIME_LIMIT=None,  # seconds of search, None = off
+    RANDOM_SEED=None,  # seed for a repeatable run, None = random
+    # Island mode, see run_islands()
+    ISLANDS=0,  # sub-populations evolved in parallel, 0 or 1 = off
+    MIGRATION_INTERVAL=5,  # generations between migrations
+    MIGRATION_SIZE=2,  # top solutions each island sends
+    MIGRATION_TOPOLOGY="RING",  # RING or FULL
+    # Evaluation over TCP, see evaluate_remote()
+    EVALUATION_PORT=None,  # coordinator port, None = off, 0 = any free port
+    EVALUATION_HOST='localhost',  # address the coordinator listens on
+    EVALUATION_LOCAL_WORKERS=0,  # workers to start on this machine
+    EVALUATION_BATCH_SIZE=50,  # genomes per batch
+    EVALUATION_TIMEOUT=60,  # seconds before a batch or worker is given up
+    USE_PROBLEM_CACHE=True,
+    PROBLEM_CACHE_DIR='cache',
+    # Row filters applied while CSV_IN is read, an empty list keeps all rows
+    FILTER_TERMS=[],  # '*Term Cd' values to keep, e.g. ["1171"]
+    FILTER_CAMPUSES=[],  # 'Campus' values to keep
+    FILTER_SUBJECT_PREFIXES=[],  # 'Class Subject + Nbr' starts, e.g. ["CS "]
+    FILTER_EXCLUDE_STATUS=[],  # drop 'Status' containing, e.g. ["Cancel"]
     UNIMPLEMENTED_BELOW_THIS_DUMMY_VAR=True,
     GENE_SWAP_PCT=50,
-    CROSSOVER_TYPE="RANDOM_SINGLE",
     MUTATION_SEVERITY=10,
     CSV_IN='Data/ScheduleOfClassesSample.csv',
     CSV_NUM_LINES=0,
@@ -80,29 +133,148 @@ GD = dict(
     FITNESS_CONSTRAINTS='Data/FitnessConstraints.csv',
     ROOM_CONSTRAINTS='Data/RoomConstraints.csv',
     INSTRUCTOR_CONSTRAINTS='Data/InstructorConstraints.csv',
+    START_TIME=0,
+    FITNESS_HISTORY=[],  # (best, average) of each generation
+    ITERATIONS_RUN=0,
+    # Genes each crossover operator swaps between two courses of a child
+    CROSSOVER_OPERATORS=collections.OrderedDict([
+        ("RANDOM_SINGLE", ['Facility ID']),
+        ("RANDOM_TIME", ['Time Slot']),
+        ("RANDOM_DOUBLE", ['Facility ID', 'Time Slot']),
+    ]),
+    OPERATOR_CREDIT={},  # decayed success rate of each crossover operator
+    OPERATOR_TRIALS={},  # this generation, operator -> [tries, improved]
+    OPERATOR_STATS={},  # same for the whole run, mutation included
+    CURRENT_MUTATION_RATE=0,
+    # Evaluation over TCP state, see start_evaluation_server()
+    EVALUATION_SERVER=None,
+    EVALUATION_PROBLEM=None,
+    EVALUATION_WORKERS=[],
+    EVALUATION_PROCESSES=[],
+    PROBLEM_CACHE_VERSION=10,
+    # Input files and settings that the compiled problem is keyed on
+    PROBLEM_INPUTS=["CSV_IN",
+                    "COURSE_CONSTRAINTS",
+                    "FITNESS_CONSTRAINTS",
+                    "ROOM_CONSTRAINTS",
+                    "INSTRUCTOR_CONSTRAINTS",
+                    ],
+    PROBLEM_SETTINGS=["DAYS",
+                      "FILTER_TERMS",
+                      "FILTER_CAMPUSES",
+                      "FILTER_SUBJECT_PREFIXES",
+                      "FILTER_EXCLUDE_STATUS",
+                      "C_PARAMS",
+                      "I_PARAMS",
+                      "R_PARAMS",
+                      "CC_PARAMS",
+                      "FC_PARAMS",
+                      "RC_PARAMS",
+                      "IC_PARAMS",
+                      "ROOM_CAPACITY_WASTE_THRESHOLD_PCT",
+                      "MINUTES_PER_UNIT",
+                      ],
+    # GD entries that make up the compiled problem
+    PROBLEM_KEYS=["C", "CO", "I", "R", "T", "CC", "FC", "RC", "IC",
+                  "CSV_NUM_LINES", "CSV_NUM_ERRORS",
+                  "C_KEYS", "C_IDS", "R_KEYS", "R_IDS",
+                  "I_KEYS", "I_IDS", "T_KEYS", "T_IDS",
+                  "C_CONSTRAINED", "C_FORCED_T", "C_FORCED_R", "C_FORCED_I",
+                  "C_INSTRUCTORS", "C_FIXED", "G_ROOM", "G_TIME",
+                  "G_INSTRUCTOR", "I_NAMES", "QUALIFIED_I",
+                  "C_ROOMS", "C_R_MASK", "C_TIMES", "C_T_MASK", "C_I_MASK",
+                  "C_DIFFICULTY", "R_BY_CAPACITY",
+                  "T_DAYS", "T_DAY_LIST", "T_START", "T_END", "T_CONFLICTS",
+                  "T_CONFLICT_LIST",
+                  "FIT_ROOM", "FIT_KILL", "FIT_INSTRUCTOR", "FIT_TIME",
+                  ],
     HIGH_FITNESS_INDEX=0,
-    LOGFILE=open('run.log', 'w'),
-    DB_2LEVEL_PARAMS=["C", "I", "R", "S", "T", "CC"],
+    # Evaluation workers only print, see run_worker()
+    LOGFILE=open(os.devnull if '--worker' in sys.argv else 'run.log', 'w'),
+    DB_2LEVEL_PARAMS=["C", "I", "R", "T", "CC"],
     DB_1LEVEL_PARAMS=["FC", "RC", "IC"],
     C=collections.defaultdict(lambda: collections.defaultdict()),  # courses
     CO=collections.OrderedDict(),
     I=collections.defaultdict(lambda: collections.defaultdict()),
     R=collections.defaultdict(lambda: collections.defaultdict()),  # rooms
     T=collections.defaultdict(lambda: collections.defaultdict()),  # times
-    S=collections.defaultdict(lambda: collections.defaultdict(
-        lambda: collections.defaultdict()
-    )),
-    S_COPY=collections.defaultdict(lambda: collections.defaultdict(
-        lambda: collections.defaultdict()
-    )),
+    # Genomes of the population, see make_assignment()
+    S={},
+    S_COPY={},
     F=collections.defaultdict(lambda: collections.defaultdict()),
-    RT=collections.defaultdict(lambda: collections.defaultdict(
-        lambda: collections.defaultdict()
-    )),
-    IT=collections.defaultdict(lambda: collections.defaultdict(
-        lambda: collections.defaultdict()
-    )),
-    CD=collections.defaultdict(int),  # stores sorted solution keys
+    # Resource calendars, see manage_resource()
+    RT={},
+    IT={},
+    RT_COPY={},
+    IT_COPY={},
+    # Free resource indexes, see execute_management()
+    RF={},
+    IF={},
+    RF_COPY={},
+    IF_COPY={},
+    FREE_INDEX={'RT': 'RF', 'IT': 'IF'},
+    CALENDARS={'S': ['RT', 'IT', 'RF', 'IF'],
+               'S_COPY': ['RT_COPY', 'IT_COPY', 'RF_COPY', 'IF_COPY']},
+    # Running fitness penalties, see initialize_penalties()
+    PT={},
+    PT_COPY={},
+    PENALTIES={'S': 'PT', 'S_COPY': 'PT_COPY'},
+    # Fitness cache, see get_cached_penalties()
+    FITNESS_CACHE=collections.OrderedDict(),
+    FITNESS_CACHE_BYTES=0,
+    FITNESS_CACHE_HITS=0,
+    FITNESS_CACHE_MISSES=0,
+    # Parallel fitness, see start_fitness_pool()
+    FITNESS_POOL=None,
+    FITNESS_SHARED={},
+    # Elite archive, a min-heap of (score, -order, genome key, genome) for
+    # the best distinct solutions found so far, see update_elite()
+    ELITE=[],
+    ELITE_KEYS=set(),
+    ELITE_ORDER=0,
+    ELITE_INDEXES=set(),  # solutions on 'S' that keep_elite() put there
+    # Compiled problem, see compile_problem(). *_KEYS[id] gives the string
+    # key of an ID, *_IDS[key] the ID of a key. C_* lists are by course ID.
+    C_KEYS=[],
+    C_IDS={},
+    R_KEYS=[],
+    R_IDS={},
+    I_KEYS=[],
+    I_IDS={},
+    T_KEYS=[],
+    T_IDS={},
+    C_CONSTRAINED=[],
+    C_FORCED_T=[],  # -1 means nothing is forced
+    C_FORCED_R=[],
+    C_FORCED_I=[],
+    C_INSTRUCTORS=[],
+    C_FIXED=array.array('b'),  # FIXED_* bits of the forced genes
+    FIXED_ROOM=1,
+    FIXED_TIME=2,
+    FIXED_INSTRUCTOR=4,
+    C_ROOMS=[],  # see compile_domains()
+    C_R_MASK=[],
+    C_TIMES=[],
+    C_T_MASK=[],
+    C_I_MASK=[],
+    R_BY_CAPACITY=[],
+    C_DIFFICULTY=[],  # see compile_construction()
+    G_ROOM=0,  # genome offsets, see compile_problem()
+    G_TIME=0,
+    G_INSTRUCTOR=0,
+    # Fitness penalty tables, see compile_fitness()
+    FIT_ROOM=array.array('l'),
+    FIT_KILL=array.array('b'),
+    FIT_INSTRUCTOR=array.array('l'),
+    FIT_TIME=array.array('l'),
+    I_NAMES={},  # see initialize_resources()
+    T_DAYS=[],  # time slot table, see compile_time_slots()
+    T_DAY_LIST=[],
+    T_START=[],
+    T_END=[],
+    T_CONFLICTS=[],
+    T_CONFLICT_LIST=[],
+    QUALIFIED_I=collections.OrderedDict(),
     CC=collections.defaultdict(lambda: collections.OrderedDict()),
     FC=collections.defaultdict(lambda: collections.defaultdict()),
     RC=collections.defaultdict(lambda: collections.defaultdict()),
@@ -137,6 +309,15 @@ GD = dict(
     R_PARAMS=["Facility ID",
               "Wait List Cap",
               ],
+    # Day columns of CSV_IN and their code within a time slot key
+    DAYS=[("Meets on Monday", "M"),
+          ("Meets on Tuesday", "T"),
+          ("Meets on Wednesday", "W"),
+          ("Meets on Thursday", "Th"),
+          ("Meets on Friday", "F"),
+          ("Meets on Saturday", "S"),
+          ("Meets on Sunday", "U"),
+          ],
     CC_PARAMS=["Course",
                "Section",
                "Instructor",
@@ -255,156 +436,219 @@ class InputProcessor:
 
     # Process the input and build out the data structures
     @staticmethod
-    def process_input_from_solution():
+    def process_schedule_of_classes():
         """
-        Temporary method to build data structures based on sample solution,
-        not sample input.
+        Single pass over GD['CSV_IN'] that builds the C, R, I and T dicts
+        together, this replaces process_input_from_solution() and
+        process_schedule_constraints() which each parsed the whole file.
+
+        Still builds data structures based on sample solution, not sample
+        input, and the valid day/time combinations are extracted from the
+        sample as well (there is an official NAU list of these somewhere).
+
+        Only the columns that get stored are pulled out of each row, the
+        rest of the ~110 columns are never turned into dict entries. The
+        extract repeats a row once per class attribute, those repeats are
+        identical in every column we use so they are dropped here.
+
+        The file is streamed a row at a time, so it can be a raw registrar
+        dump covering several terms and campuses: the FILTER_* settings
+        are checked on the raw row before anything is stored. Values are
+        interned and equal values share one list, so a large extract
+        doesn't cost a new one-element list per field.
+
         :return: none
         """
         import csv
+        import sys
 
         H.say("INFO", "Processing input ...")
         row_num = 0
+        num_duplicates = 0
+        num_filtered = 0
+        seen_rows = set()
+        value_lists = {}
+        fields = InputProcessor.get_ingest_fields()
         # Iterate over the CSV and extract the information
         with open(GD['CSV_IN'], newline='', encoding='utf-8') as csv_in:
-            csv_data = csv.DictReader(csv_in, delimiter=',', quotechar='"')
-            for row in csv_data:
+            csv_data = csv.reader(csv_in, delimiter=',', quotechar='"')
+            header = next(csv_data)
+            # Repeated column names resolve to the last one, like DictReader
+            column = {name: i for i, name in enumerate(header)}
+            for field in fields:
+                if field not in column:
+                    H.say("ERROR", "Column ", field, " not found in ",
+                          GD['CSV_IN'])
+            indexes = [column[field] for field in fields]
+            checks = InputProcessor.get_row_filters(column)
+            num_columns = len(header)
+            for line in csv_data:
                 GD['CSV_NUM_LINES'] += 1
-                course_key = row['*Course ID'] + "_" + row['*Section']
-                instructor_key = row['Instructor Jan/Dana ID']
-                room_key = row['Facility ID']
-                if course_key == '' or course_key == ' ':
-                    H.say("VERBOSE", "Skipping blank record from row ",
-                          row_num+1
-                          )
+                if len(line) < num_columns:
+                    line += [''] * (num_columns - len(line))
+                if not InputProcessor.keep_row(line, checks):
+                    num_filtered += 1
                     continue
-                # Now store course information into DB, can't do this
-                # in a loop for each set of params because the id_num
-                # will be different for courses/rooms/profs
-                # TODO: error check here, see if already exists and diff
-                for c_param in GD['C_PARAMS']:
-                    GD['C'][course_key][c_param] = [row[c_param]]
-                # store room information
-                if room_key == '' or room_key == ' ':
-                    H.say("LOG", "Missing room info from row ", row_num+1)
+                values = tuple([sys.intern(line[i]) for i in indexes])
+                if values in seen_rows:
+                    num_duplicates += 1
                     continue
-                for r_param in GD['R_PARAMS']:
-                    GD['R'][room_key][r_param] = [row[r_param]]
-
-                # store instructor information
-                if instructor_key == '' or instructor_key == ' ':
-                    H.say("LOG", "Missing instructor info from row ",
-                          row_num + 1
-                          )
-                    continue
-                for i_param in GD['I_PARAMS']:
-                    if instructor_key == '':
-                        H.say("LOG", "Missing", i_param, " from row ",
-                              row_num + 1
-                              )
-                        continue
-                    GD['I'][instructor_key][i_param] = [row[i_param]]
+                seen_rows.add(values)
                 row_num += 1
+                row = dict(zip(fields, values))
+                InputProcessor.store_time_slot(row, row_num)
+                InputProcessor.store_course_row(row, row_num, value_lists)
         H.say("INFO", "Done pre-processing, found ",
               GD['CSV_NUM_LINES'], " lines, ",
+              num_filtered, " filtered, ",
+              num_duplicates, " duplicates, ",
               GD['CSV_NUM_ERRORS'], " errors")
+        H.say("INFO", "Done, created ", len(GD['T']),
+              " time slots from ", row_num, " lines")
 
     @staticmethod
-    def process_schedule_constraints():
+    def get_ingest_fields():
         """
-        Method to store which contains the valid dates/times
-        that classes will be held and populate a hash. Could store
-        this info during input_processing, but having a separate method
-        makes for a more modular solution
+        Helper to list the columns of GD['CSV_IN'] that ingest needs, in a
+        fixed order and without repeats.
 
-        This method uses the sample CSV as the set of constraints to
-        extract valid day/time combinations from.
+        :return: list of column names
+        """
+        fields = ['*Course ID', '*Section', 'Instructor Jan/Dana ID',
+                  'Facility ID', 'Start Time', 'End Time']
+        fields += [day[0] for day in GD['DAYS']]
+        fields += GD['C_PARAMS'] + GD['R_PARAMS'] + GD['I_PARAMS']
+        return list(collections.OrderedDict.fromkeys(fields))
 
-        For date/times - there is official NAU list of this somewhere, can
-        pull this in later if time but for now, just extract information
-        from the Sample
+    @staticmethod
+    def get_row_filters(column):
+        """
+        Helper to process_schedule_of_classes(), turns the FILTER_* settings
+        into a list of (column index, check, values) for keep_row().
 
-        :return:
+        :param column: dict of column name to index in CSV_IN
+        :return: list of checks, empty if no filters are set
         """
-        import csv
+        checks = []
+        filters = [('*Term Cd', 'is', GD['FILTER_TERMS']),
+                   ('Campus', 'is', GD['FILTER_CAMPUSES']),
+                   ('Class Subject + Nbr', 'starts',
+                    GD['FILTER_SUBJECT_PREFIXES']),
+                   ('Status', 'excludes', GD['FILTER_EXCLUDE_STATUS']),
+                   ]
+        for field, check, values in filters:
+            if not values:
+                continue
+            if field not in column:
+                H.say("ERROR", "Can't filter on ", field, ", column not ",
+                      "found in ", GD['CSV_IN'])
+            H.say("LOG", "Filtering ", field, " ", check, " ", values)
+            checks.append((column[field], check, tuple(values)))
+        return checks
 
-        H.say("INFO", "Processing schedule constraints ...")
-        row_num = 0
-        # Iterate over the CSV and extract the information
-        with open(GD['CSV_IN'], newline='', encoding='utf-8') as csv_in:
-            csv_data = csv.DictReader(csv_in, delimiter=',', quotechar='"')
-            for row in csv_data:
-                time_slot_code = ''
-                has_a_day = 0
-                row_num += 1
-                # Pull the day information
-                if row['Meets on Monday'] == "Y":
-                    time_slot_code += "M"
-                    has_a_day += 1
-                if row['Meets on Tuesday'] == "Y":
-                    time_slot_code += "T"
-                    has_a_day += 1
-                if row['Meets on Wednesday'] == "Y":
-                    time_slot_code += "W"
-                    has_a_day += 1
-                if row['Meets on Thursday'] == "Y":
-                    time_slot_code += "Th"
-                    has_a_day += 1
-                if row['Meets on Friday'] == "Y":
-                    time_slot_code += "F"
-                    has_a_day += 1
-                if row['Meets on Saturday'] == "Y":
-                    time_slot_code += "S"
-                    has_a_day += 1
-                if row['Meets on Sunday'] == "Y":
-                    time_slot_code += "U"
-                    has_a_day += 1
-                # skip this row if no day assigned
-                if has_a_day == 0:
-                    H.say("LOG", "Warning, no days found in row ", row_num)
-                    continue
+    @staticmethod
+    def keep_row(line, checks):
+        """
+        Helper to process_schedule_of_classes(), checks a raw CSV row
+        against the filters from get_row_filters().
 
-                # Pull the time information
-                # start time
-                H.say("DBG", row_num, "<>", row['Start Time'])
-                fragments = row['Start Time'].split(' ')
-                try:
-                    start_time = fragments[1]
-                except:
-                    H.say("LOG", "Warning, no time in row ", row_num)
-                fragments = row['End Time'].split(' ')
-                # end time
-                try:
-                    end_time = fragments[1]
-                except:
-                    H.say("LOG", "Warning, no time in row ", row_num)
-                time_slot_code += "_" + start_time + "_" + end_time
-                H.say("DBG", time_slot_code)
-                
-                # Populate the time slot hash with needed info now
-                # that we have the key
-                GD['T'][time_slot_code]['Start Time'] = start_time
-                GD['T'][time_slot_code]['End Time'] = end_time
-                GD['T'][time_slot_code]['Meets on Monday'] \
-                    = row['Meets on Monday']
-                GD['T'][time_slot_code]['Meets on Tuesday'] \
-                    = row['Meets on Tuesday']
-                GD['T'][time_slot_code]['Meets on Wednesday'] \
-                    = row['Meets on Wednesday']
-                GD['T'][time_slot_code]['Meets on Thursday'] \
-                    = row['Meets on Thursday']
-                GD['T'][time_slot_code]['Meets on Friday'] \
-                    = row['Meets on Friday']
-                GD['T'][time_slot_code]['Meets on Saturday'] \
-                    = row['Meets on Saturday']
-                GD['T'][time_slot_code]['Meets on Sunday'] \
-                    = row['Meets on Sunday']
-                GD['T'][time_slot_code]['AlreadyAssigned'] = "false"
-        # Finished
-        H.say(
-            "INFO", "Done, created ", len(GD['T']),
-            " time slots from ", row_num, " lines"
-        )
+        :param line: list of all values in the row
+        :param checks: from get_row_filters()
+        :return: True if the row should be stored
+        """
+        for index, check, values in checks:
+            value = line[index]
+            if check == 'is' and value not in values:
+                return False
+            if check == 'starts' and not value.startswith(values):
+                return False
+            if check == 'excludes':
+                for v in values:
+                    if v in value:
+                        return False
+        return True
+
+    @staticmethod
+    def store_course_row(row, row_num, value_lists):
+        """
+        Helper to process_schedule_of_classes(), stores the course, room
+        and instructor information from one row.
+
+        :param row: dict of the ingest fields for the row
+        :param row_num: used for messages
+        :param value_lists: shared one-element list for each value seen
+        :return: none
+        """
+        course_key = row['*Course ID'] + "_" + row['*Section']
+        instructor_key = row['Instructor Jan/Dana ID']
+        room_key = row['Facility ID']
+        if course_key == '' or course_key == ' ':
+            H.say("VERBOSE", "Skipping blank record from row ", row_num)
+            return
+        # Now store course information into DB, can't do this
+        # in a loop for each set of params because the id_num
+        # will be different for courses/rooms/profs
+        # TODO: error check here, see if already exists and diff
+        for c_param in GD['C_PARAMS']:
+            value = row[c_param]
+            GD['C'][course_key][c_param] = \
+                value_lists.setdefault(value, [value])
+        # store room information
+        if room_key == '' or room_key == ' ':
+            H.say("LOG", "Missing room info from row ", row_num)
+            return
+        for r_param in GD['R_PARAMS']:
+            value = row[r_param]
+            GD['R'][room_key][r_param] = value_lists.setdefault(value, [value])
+
+        # store instructor information
+        if instructor_key == '' or instructor_key == ' ':
+            H.say("LOG", "Missing instructor info from row ", row_num)
+            return
+        for i_param in GD['I_PARAMS']:
+            value = row[i_param]
+            GD['I'][instructor_key][i_param] = \
+                value_lists.setdefault(value, [value])
+
+    @staticmethod
+    def store_time_slot(row, row_num):
+        """
+        Helper to process_schedule_of_classes(), stores the day/time
+        combination the row meets at as a time slot on GD['T'].
+
+        :param row: dict of the ingest fields for the row
+        :param row_num: used for messages
+        :return: none
+        """
+        # Pull the day information
+        time_slot_code = ''
+        for day_param, day_code in GD['DAYS']:
+            if row[day_param] == "Y":
+                time_slot_code += day_code
+        # skip this row if no day assigned
+        if time_slot_code == '':
+            H.say("LOG", "Warning, no days found in row ", row_num)
+            return
+
+        # Pull the time information, e.g. "1/1/2000 16:00"
+        H.say("DBG", row_num, "<>", row['Start Time'])
+        start_fragments = row['Start Time'].split(' ')
+        end_fragments = row['End Time'].split(' ')
+        if len(start_fragments) < 2 or len(end_fragments) < 2:
+            H.say("LOG", "Warning, no time in row ", row_num)
+            return
+        start_time = start_fragments[1]
+        end_time = end_fragments[1]
+        time_slot_code += "_" + start_time + "_" + end_time
+        H.say("DBG", time_slot_code)
+
+        # Populate the time slot hash with needed info now
+        # that we have the key
+        GD['T'][time_slot_code]['Start Time'] = start_time
+        GD['T'][time_slot_code]['End Time'] = end_time
+        for day_param, day_code in GD['DAYS']:
+            GD['T'][time_slot_code][day_param] = row[day_param]
+        GD['T'][time_slot_code]['AlreadyAssigned'] = "false"
 
     @staticmethod
     def process_csv_constraints(csv_file, param):
@@ -468,6 +712,498 @@ class InputProcessor:
               " lines."
               )
 
+    @staticmethod
+    def build_problem():
+        """
+        Method to build the whole problem from the input CSVs: ingest,
+        constraints, and the derived structures (qualified instructor
+        lists on GD['C'], GD['CO'] course order) that used to be built at
+        the start of generate_random_solutions().
+
+        Loads a compiled copy of the problem instead when one exists for
+        the same inputs, see problem_cache_file().
+
+        :return: none
+        """
+        cache_file = ""
+        if GD['USE_PROBLEM_CACHE']:
+            cache_file = InputProcessor.problem_cache_file()
+            if InputProcessor.load_problem_cache(cache_file):
+                return
+
+        InputProcessor.process_schedule_of_classes()
+        InputProcessor.process_csv_constraints(GD['COURSE_CONSTRAINTS'],
+                                               "CC_PARAMS")
+        InputProcessor.process_csv_constraints(GD['FITNESS_CONSTRAINTS'],
+                                               "FC_PARAMS")
+        InputProcessor.process_csv_constraints(GD['ROOM_CONSTRAINTS'],
+                                               "RC_PARAMS")
+        InputProcessor.process_csv_constraints(GD['INSTRUCTOR_CONSTRAINTS'],
+                                               "IC_PARAMS")
+        Population.initialize_resources()
+        Population.pre_order_courses()
+        InputProcessor.compile_problem()
+
+        if GD['USE_PROBLEM_CACHE']:
+            InputProcessor.save_problem_cache(cache_file)
+
+    @staticmethod
+    def compile_problem():
+        """
+        Problem compiler, assigns a dense integer ID to every course, room,
+        instructor and time slot once the inputs are processed. The GA
+        works on these IDs only, string keys come back at export time by
+        way of the *_KEYS lists.
+
+        Course IDs follow the GD['CO'] order, so walking them in order still
+        places the forced assignments first. The CourseConstraints for each
+        course are resolved to IDs here as well, so nothing needs to build
+        a cc_key during the generation loops.
+
+        :return: none
+        """
+        H.say("INFO", "Compiling problem...")
+        GD['C_KEYS'] = list(GD['CO'])
+        GD['R_KEYS'] = list(GD['R'])
+        GD['I_KEYS'] = list(GD['I'])
+        GD['T_KEYS'] = list(GD['T'])
+        for code in ['C', 'R', 'I', 'T']:
+            GD[code + '_IDS'] = {}
+            for key_id, key in enumerate(GD[code + '_KEYS']):
+                GD[code + '_IDS'][key] = key_id
+        InputProcessor.compile_time_slots()
+
+        # A genome is one row of room, time slot and instructor IDs for
+        # every course, the genes of course ID c are at G_* + c.
+        num_courses = len(GD['C_KEYS'])
+        GD['G_ROOM'] = 0
+        GD['G_TIME'] = num_courses
+        GD['G_INSTRUCTOR'] = 2 * num_courses
+
+        GD['C_CONSTRAINED'] = []
+        GD['C_FORCED_T'] = []
+        GD['C_FORCED_R'] = []
+        GD['C_FORCED_I'] = []
+        GD['C_INSTRUCTORS'] = []
+        GD['C_FIXED'] = array.array('b')
+        for course in GD['C_KEYS']:
+            course_name = GD['C'][course]['Class Subject + Nbr'][0]
+            course_section = GD['C'][course]['*Section'][0]
+            cc_key = course_name + "_" + course_section
+            constraint = GD['CC'].get(cc_key, {})
+            forced_t = -1
+            forced_r = -1
+            forced_i = -1
+            if 'Time Slot' in constraint:
+                time = constraint['Time Slot']
+                if time not in GD['T_IDS']:
+                    H.say("ERROR", "Trying to assign non-existent time slot ",
+                          time, " for course: ", course_name,
+                          " section: ", course_section,
+                          "\nAre you forcing ",
+                          "invalid constraint in CourseConstraints?"
+                          )
+                forced_t = GD['T_IDS'][time]
+            if 'Room' in constraint:
+                room = constraint['Room']
+                if room not in GD['R_IDS']:
+                    H.say("ERROR", "Trying to force assign unknown room ",
+                          room, " for course: ", course_name,
+                          " section: ", course_section)
+                room_capacity = GD['RC'][room]['Capacity']
+                course_capacity = GD['C'][course]['Enrollment Cap'][0]
+                if int(course_capacity) > int(room_capacity):
+                    H.say("ERROR", "Trying to assign course ",
+                          course_name, " with capacity ",
+                          course_capacity, " to room ",
+                          room, " but will be over room capacity(",
+                          room_capacity, ")!"
+                          )
+                forced_r = GD['R_IDS'][room]
+            if 'Instructor' in constraint:
+                instructor = H.get_id(constraint['Instructor'])
+                if instructor not in GD['I_IDS']:
+                    H.say("ERROR", "Trying to force assign unknown ",
+                          "instructor ", constraint['Instructor'],
+                          " for course: ", course_name,
+                          " section: ", course_section)
+                forced_i = GD['I_IDS'][instructor]
+            constrained = 'Course' in constraint and 'Section' in constraint
+            GD['C_CONSTRAINED'].append(constrained)
+            GD['C_FORCED_T'].append(forced_t)
+            GD['C_FORCED_R'].append(forced_r)
+            GD['C_FORCED_I'].append(forced_i)
+            # Forced genes are the same in every solution, so one mask per
+            # course covers the whole population
+            fixed = 0
+            if constrained and forced_r != -1:
+                fixed |= GD['FIXED_ROOM']
+            if constrained and forced_t != -1:
+                fixed |= GD['FIXED_TIME']
+            if constrained and forced_i != -1:
+                fixed |= GD['FIXED_INSTRUCTOR']
+            GD['C_FIXED'].append(fixed)
+            GD['C_INSTRUCTORS'].append(
+                [GD['I_IDS'][i] for i in GD['C'][course]['Instructors']]
+            )
+        InputProcessor.compile_fitness()
+        InputProcessor.compile_domains()
+        InputProcessor.compile_construction()
+        H.say("INFO", "Done, ", len(GD['C_KEYS']), " courses, ",
+              len(GD['R_KEYS']), " rooms, ", len(GD['I_KEYS']),
+              " instructors, ", len(GD['T_KEYS']), " time slots")
+
+    @staticmethod
+    def compile_time_slots():
+        """
+        Helper to compile_problem(), builds the time slot table from GD['T']
+        so calendar operations work on numbers instead of slot strings.
+        Indexed by time slot ID:
+
+        T_DAYS = bitmask of the days the slot meets, bit n is GD['DAYS'][n]
+        T_DAY_LIST = list of those day numbers
+        T_START, T_END = start and end in minutes since midnight
+        T_CONFLICTS = bitset row of the slot x slot overlap matrix, bit n
+                      is set if the slot overlaps slot ID n on some day
+        T_CONFLICT_LIST = the same row as a list of slot IDs
+
+        Example: MWF_8:00_8:50 -> 0b10101, [0, 2, 4], 480, 530
+
+        Two slots overlap if they share a day and their times touch, the
+        same c1/c2/c3 conditions manage_resource() used to check. So odd
+        pairs like Th_14:20_17:40 and Th_17:30_20:00 conflict.
+
+        :return: none
+        """
+        GD['T_DAYS'] = []
+        GD['T_DAY_LIST'] = []
+        GD['T_START'] = []
+        GD['T_END'] = []
+        for time in GD['T_KEYS']:
+            day_mask = 0
+            day_list = []
+            for day, (day_param, day_code) in enumerate(GD['DAYS']):
+                if GD['T'][time][day_param] == "Y":
+                    day_mask |= 1 << day
+                    day_list.append(day)
+            GD['T_DAYS'].append(day_mask)
+            GD['T_DAY_LIST'].append(day_list)
+            GD['T_START'].append(H.get_minutes(GD['T'][time]['Start Time']))
+            GD['T_END'].append(H.get_minutes(GD['T'][time]['End Time']))
+
+        GD['T_CONFLICTS'] = []
+        num_slots = len(GD['T_KEYS'])
+        for t1 in range(num_slots):
+            conflicts = 0
+            start = GD['T_START'][t1]
+            end = GD['T_END'][t1]
+            for t2 in range(num_slots):
+                if not GD['T_DAYS'][t1] & GD['T_DAYS'][t2]:
+                    continue
+                bt_start = GD['T_START'][t2]
+                bt_end = GD['T_END'][t2]
+                c1 = ((start >= bt_start) and (start <= bt_end))
+                c2 = ((end >= bt_start) and (end <= bt_end))
+                c3 = ((start < bt_start) and (end > bt_end))
+                if c1 or c2 or c3:
+                    conflicts |= 1 << t2
+            GD['T_CONFLICTS'].append(conflicts)
+        GD['T_CONFLICT_LIST'] = [
+            [t2 for t2 in range(num_slots) if conflicts >> t2 & 1]
+            for conflicts in GD['T_CONFLICTS']
+        ]
+
+    @staticmethod
+    def compile_fitness():
+        """
+        Helper to compile_problem(), turns the fitness rules into penalty
+        tables so fitness() only has to gather and sum them. Every rule
+        depends on at most two genes of a course, so:
+
+        FIT_ROOM[course * num_rooms + room] = room proximity and wasted
+                                              capacity penalties
+        FIT_KILL[course * num_rooms + room] = 1 if the room is too small,
+                                              which zeroes the score
+        FIT_INSTRUCTOR[instructor * num_rooms + room] = instructor
+                                                        proximity penalty
+        FIT_TIME[time] = time of day penalty
+
+        :return: none
+        """
+        instructor_penalty = int(GD['FC']['Instructor Proximity']['Penalty'])
+        room_penalty = int(GD['FC']['Room Proximity']['Penalty'])
+        # NOTE: 'Time of day' has always used the 'Room Proximity' penalty
+        time_penalty = int(GD['FC']['Room Proximity']['Penalty'])
+        waste_penalty = int(GD['FC']['Wasted Capacity']['Penalty'])
+        buildings = [GD['RC'][room]['Building'] for room in GD['R_KEYS']]
+
+        GD['FIT_ROOM'] = array.array('l')
+        GD['FIT_KILL'] = array.array('b')
+        for course in GD['C_KEYS']:
+            capacity = GD['C'][course]['Enrollment Cap'][0]
+            for room_id, room in enumerate(GD['R_KEYS']):
+                penalty = 0
+                kill = 0
+                # TODO: fix this, Unit is list, building string, values
+                # won't equal anyway
+                if GD['C'][course]['Unit'] != buildings[room_id]:
+                    penalty += room_penalty
+                room_capacity = GD['RC'][room]['Capacity']
+                # NOTE: room_util is negative for a room that is too small,
+                # so kill is never set and such a room takes no penalty
+                room_util = (1 - (int(capacity)/int(room_capacity)))*100
+                if room_util > 100:
+                    kill = 1
+                elif room_util > GD['ROOM_CAPACITY_WASTE_THRESHOLD_PCT']:
+                    penalty += waste_penalty
+                GD['FIT_ROOM'].append(penalty)
+                GD['FIT_KILL'].append(kill)
+
+        GD['FIT_INSTRUCTOR'] = array.array('l')
+        for instructor in GD['I_KEYS']:
+            for building in buildings:
+                if GD['IC'][instructor]['Instructor Building'] != building:
+                    GD['FIT_INSTRUCTOR'].append(instructor_penalty)
+                else:
+                    GD['FIT_INSTRUCTOR'].append(0)
+
+        GD['FIT_TIME'] = array.array('l')
+        for time in GD['T_KEYS']:
+            start_time = H.get_time(GD['T'][time]['Start Time'])
+            if start_time < 900 or start_time > 1700:
+                GD['FIT_TIME'].append(time_penalty)
+            else:
+                GD['FIT_TIME'].append(0)
+
+    @staticmethod
+    def compile_domains():
+        """
+        Helper to compile_problem(), works out once per course which rooms
+        and time slots it can be given at all, so generation and mutation
+        only ever draw from these:
+
+        R_BY_CAPACITY = room IDs, smallest capacity first
+        C_ROOMS[course] = room IDs with a 'Capacity' of at least the
+                          'Enrollment Cap', smallest first. A LAB section
+                          only gets the rooms whose 'Labs Supported' lists
+                          the course, if any room does.
+        C_TIMES[course] = time slot IDs. A LEC with a fixed number of
+                          units only gets the slots that meet for
+                          MINUTES_PER_UNIT minutes a week per unit, the
+                          same check summary.py makes.
+        C_INSTRUCTORS[course] = the qualified instructors, already built
+        C_R_MASK, C_T_MASK, C_I_MASK = the same as bitmasks
+
+        A forced gene (see C_FIXED) has just the forced element as its
+        domain. A course that no room or slot fits keeps all of them, it
+        is then scored by fitness() as before.
+
+        :return: none
+        """
+        capacities = [int(GD['RC'][room]['Capacity'])
+                      for room in GD['R_KEYS']]
+        GD['R_BY_CAPACITY'] = sorted(range(len(GD['R_KEYS'])),
+                                     key=capacities.__getitem__)
+        labs = []
+        for room in GD['R_KEYS']:
+            supported = GD['RC'][room]['Labs Supported'].split(',')
+            labs.append(set(lab.strip() for lab in supported))
+        minutes = [(GD['T_END'][t] - GD['T_START'][t]) *
+                   len(GD['T_DAY_LIST'][t])
+                   for t in range(len(GD['T_KEYS']))]
+
+        GD['C_ROOMS'] = []
+        GD['C_R_MASK'] = []
+        GD['C_TIMES'] = []
+        GD['C_T_MASK'] = []
+        GD['C_I_MASK'] = []
+        for course, course_key in enumerate(GD['C_KEYS']):
+            name = GD['C'][course_key]['Class Subject + Nbr'][0]
+            component = GD['C'][course_key]['Component Cd'][0].strip()
+            capacity = int(GD['C'][course_key]['Enrollment Cap'][0])
+            forced_r = GD['C_FORCED_R'][course]
+            forced_t = GD['C_FORCED_T'][course]
+
+            rooms = [r for r in GD['R_BY_CAPACITY']
+                     if capacities[r] >= capacity or r == forced_r]
+            if component == 'LAB':
+                lab_rooms = [r for r in rooms
+                             if name in labs[r] or r == forced_r]
+                if lab_rooms:
+                    rooms = lab_rooms
+                else:
+                    H.say("LOG", "No room supports lab ", name,
+                          ", using any room big enough")
+            if not rooms:
+                H.say("WARN", "No room is big enough for ", course_key,
+                      " (", name, "), using any room")
+                rooms = list(GD['R_BY_CAPACITY'])
+
+            times = list(range(len(GD['T_KEYS'])))
+            max_units = GD['C'][course_key]['Maximum Units'][0]
+            min_units = GD['C'][course_key]['Minimum Units'][0]
+            if component == 'LEC' and max_units == min_units:
+                length = GD['MINUTES_PER_UNIT'] * int(max_units)
+                unit_times = [t for t in times
+                              if minutes[t] == length or t == forced_t]
+                if unit_times:
+                    times = unit_times
+                else:
+                    H.say("LOG", "No time slot meets ", length,
+                          " minutes for ", course_key, " (", name,
+                          "), using any time slot")
+
+            fixed = GD['C_FIXED'][course]
+            if fixed & GD['FIXED_ROOM']:
+                rooms = [forced_r]
+            if fixed & GD['FIXED_TIME']:
+                times = [forced_t]
+            if fixed & GD['FIXED_INSTRUCTOR']:
+                GD['C_INSTRUCTORS'][course] = [GD['C_FORCED_I'][course]]
+
+            r_mask = 0
+            for r in rooms:
+                r_mask |= 1 << r
+            t_mask = 0
+            for t in times:
+                t_mask |= 1 << t
+            i_mask = 0
+            for i in GD['C_INSTRUCTORS'][course]:
+                i_mask |= 1 << i
+            GD['C_ROOMS'].append(rooms)
+            GD['C_R_MASK'].append(r_mask)
+            GD['C_TIMES'].append(times)
+            GD['C_T_MASK'].append(t_mask)
+            GD['C_I_MASK'].append(i_mask)
+
+    @staticmethod
+    def compile_construction():
+        """
+        Helper to compile_problem(), builds the static table that
+        construct_solution() orders courses by:
+
+        C_DIFFICULTY[course] = (qualified instructors, rooms in the domain,
+                                -forced neighbours), smaller is harder.
+                               Forced neighbours are courses with a forced
+                               time slot that share a qualified instructor.
+
+        :return: none
+        """
+        forced_courses = collections.defaultdict(int)
+        for course in range(len(GD['C_KEYS'])):
+            if GD['C_CONSTRAINED'][course] and \
+                    GD['C_FORCED_T'][course] != -1:
+                for instructor in GD['C_INSTRUCTORS'][course]:
+                    forced_courses[instructor] += 1
+
+        GD['C_DIFFICULTY'] = []
+        for course in range(len(GD['C_KEYS'])):
+            neighbours = sum(forced_courses[i]
+                             for i in GD['C_INSTRUCTORS'][course])
+            GD['C_DIFFICULTY'].append((len(GD['C_INSTRUCTORS'][course]),
+                                       len(GD['C_ROOMS'][course]),
+                                       -neighbours))
+
+    @staticmethod
+    def problem_hash():
+        """
+        Helper to identify the compiled problem, a hash of the content of
+        every input CSV plus the GD settings in GD['PROBLEM_SETTINGS'], so
+        any change to either gives a new ID.
+
+        :return: hex digest
+        """
+        import hashlib
+
+        digest = hashlib.sha1()
+        digest.update(repr(GD['PROBLEM_CACHE_VERSION']).encode('utf-8'))
+        for setting in GD['PROBLEM_SETTINGS']:
+            digest.update(repr((setting, GD[setting])).encode('utf-8'))
+        for csv_key in GD['PROBLEM_INPUTS']:
+            with open(GD[csv_key], 'rb') as fh:
+                for block in iter(lambda: fh.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def problem_cache_file(problem_id=None):
+        """
+        Helper to name the compiled problem file, see problem_hash().
+
+        :param problem_id: problem hash, None for the current inputs
+        :return: path of the cache file
+        """
+        if problem_id is None:
+            problem_id = InputProcessor.problem_hash()
+        return os.path.join(GD['PROBLEM_CACHE_DIR'],
+                            "problem_" + problem_id + ".pickle")
+
+    @staticmethod
+    def load_problem_cache(cache_file):
+        """
+        Restore every GD['PROBLEM_KEYS'] entry from a compiled problem file.
+
+        :param cache_file: from problem_cache_file()
+        :return: True if loaded, False if it needs to be built
+        """
+        import os
+        import pickle
+
+        if not os.path.isfile(cache_file):
+            H.say("LOG", "No compiled problem at ", cache_file)
+            return False
+        try:
+            with open(cache_file, 'rb') as fh:
+                problem = pickle.load(fh)
+        except Exception as e:
+            H.say("INFO", "Ignoring unreadable ", cache_file, ", ", e)
+            return False
+        if sorted(problem) != sorted(GD['PROBLEM_KEYS']):
+            H.say("INFO", "Ignoring out of date ", cache_file)
+            return False
+
+        for key in problem:
+            # Keep the GD defaultdicts so their default factories still work
+            if isinstance(GD[key], dict):
+                GD[key].clear()
+                GD[key].update(problem[key])
+            else:
+                GD[key] = problem[key]
+        H.say("INFO", "Loaded compiled problem from ", cache_file, ", ",
+              len(GD['C']), " courses, ", len(GD['T']), " time slots")
+        return True
+
+    @staticmethod
+    def save_problem_cache(cache_file):
+        """
+        Write every GD['PROBLEM_KEYS'] entry to a compiled problem file.
+        Top level defaultdicts are stored as OrderedDicts since their
+        lambda factories can't be pickled.
+
+        :param cache_file: from problem_cache_file()
+        :return: none
+        """
+        import os
+        import pickle
+
+        problem = {}
+        for key in GD['PROBLEM_KEYS']:
+            if isinstance(GD[key], collections.defaultdict):
+                problem[key] = collections.OrderedDict(GD[key])
+            else:
+                problem[key] = GD[key]
+        temp_file = cache_file + "." + str(os.getpid())
+        try:
+            os.makedirs(GD['PROBLEM_CACHE_DIR'], exist_ok=True)
+            with open(temp_file, 'wb') as fh:
+                pickle.dump(problem, fh, pickle.HIGHEST_PROTOCOL)
+            # Atomic, so a parallel run never sees half a file
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            H.say("INFO", "Could not write ", cache_file, ", ", e)
+            return
+        H.say("INFO", "Saved compiled problem to ", cache_file)
+
     @staticmethod
     def print_database_1level(param):
         """
@@ -640,6 +1376,79 @@ class H:
         if "ERROR" in level:
             sys.exit(2)
 
+    @staticmethod
+    def can_fork(feature):
+        """
+        Helper to check that worker processes can be forked. Main runs at
+        import, so workers can't be spawned, they would run it again.
+
+        :param feature: name of the setting that needs the workers
+        :return: True if fork is available
+        """
+        import multiprocessing
+        if 'fork' in multiprocessing.get_all_start_methods():
+            return True
+        H.say("WARN", feature, " needs the fork start method, ignoring it")
+        return False
+
+    @staticmethod
+    def send_message(sock, header, payload=b''):
+        """
+        Helper to send one message of the evaluation protocol: the lengths
+        of a JSON header and a binary payload, then both.
+
+        :param sock: connected socket
+        :param header: dict, must be JSON serializable
+        :param payload: bytes, e.g. genome rows
+        :return:
+        """
+        import json
+        import struct
+        data = json.dumps(header).encode('utf-8')
+        sock.sendall(struct.pack('!II', len(data), len(payload)) + data +
+                     payload)
+
+    @staticmethod
+    def receive_message(sock):
+        """
+        Helper to receive one message sent by send_message().
+
+        :param sock: connected socket
+        :return: (header, payload), or (None, None) if the connection closed
+        """
+        import json
+        import struct
+        sizes = H.receive_exactly(sock, 8)
+        if sizes is None:
+            return None, None
+        header_len, payload_len = struct.unpack('!II', sizes)
+        data = H.receive_exactly(sock, header_len)
+        payload = H.receive_exactly(sock, payload_len)
+        if data is None or payload is None:
+            return None, None
+        return json.loads(data.decode('utf-8')), payload
+
+    @staticmethod
+    def receive_exactly(sock, size):
+        """
+        Helper to receive_message(), reads exactly size bytes.
+
+        :param sock: connected socket
+        :param size: number of bytes
+        :return: bytes, or None if the connection closed or failed
+        """
+        chunks = []
+        while size > 0:
+            try:
+                chunk = sock.recv(min(size, 1 << 20))
+            except OSError:
+                return None
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
     @staticmethod
     def help(*args):
         if args[0] == 1:
@@ -657,7 +1466,7 @@ class H:
                   "  - at same time\n",
                   "  - for given instructor(s)\n"
                   )
-        # H.help(2, course, instructor, room, course_name, course_section)
+        # H.help(2, course_key, instructor, room, course_name, course_section)
         if args[0] == 2:
             H.say("ERROR", "not able to make random assignment: \n",
                   "course: ", args[1], "\n",
@@ -701,8 +1510,9 @@ class H:
     @staticmethod
     def copy_solution(from_key, to_key, from_db, to_db):
         """
-        Helper to perform the copy of all key/value pairs for a
-        solution entry in one dict to another
+        Helper to copy a solution from one dict to another. The genome is
+        a flat array so this is a row copy, the resource calendars and
+        running penalties of the solution are copied along with it.
         :param from_key:
         :param to_key:
         :param from_db:
@@ -711,9 +1521,15 @@ class H:
         """
         H.say("DBG", "Copying solution ", from_key,
               " from ", from_key, " to ", to_key)
-        for c in GD[from_db][from_key]:
-            for param in GD['S_PARAMS']:
-                GD[to_db][to_key][c][param] = GD[from_db][from_key][c][param]
+        GD[to_db][to_key] = array.array('h', GD[from_db][from_key])
+        for from_cal, to_cal in zip(GD['CALENDARS'][from_db],
+                                    GD['CALENDARS'][to_db]):
+            GD[to_cal][to_key] = list(GD[from_cal][from_key])
+        from_pt = GD[GD['PENALTIES'][from_db]]
+        if from_key in from_pt:
+            total, killed, penalties = from_pt[from_key]
+            GD[GD['PENALTIES'][to_db]][to_key] = \
+                [total, set(killed), array.array('l', penalties)]
 
     @staticmethod
     def check_day_equivalence(reference, check):
@@ -756,68 +1572,109 @@ class H:
         return False
 
     @staticmethod
-    def check_forced(index, course, element_type):
+    def check_forced(course, element_type):
+        """
+        Helper to check if the given gene of a course was forced by
+        CourseConstraints, in which case it must never change.
+
+        :param course: course ID
+        :param element_type: 'Facility ID', 'Time Slot' or instructor
+        :return: True if forced
+        """
         if "Facility" in element_type:
-            forced_type = "RoomForced"
+            forced_type = GD['FIXED_ROOM']
         elif "Time" in element_type:
-            forced_type = "TimeForced"
+            forced_type = GD['FIXED_TIME']
         elif "Instructor" in element_type:
-            forced_type = "InstructorForced"
+            forced_type = GD['FIXED_INSTRUCTOR']
         else:
             H.say("ERROR", "Unsupported type to check_forced(): ",
                   element_type)
-        if forced_type in GD['S'][index][course]:
+        if GD['C_FIXED'][course] & forced_type:
             return True
         return False
 
     @staticmethod
-    def execute_management(resource_type, index, resource, day, time, mode):
+    def get_gene(element_type):
+        """
+        Helper to get the genome offset of an element type, the gene of
+        course ID c is then at offset + c.
+
+        :param element_type: 'Facility ID', 'Time Slot' or instructor
+        :return: offset
+        """
+        if "Facility" in element_type:
+            return GD['G_ROOM']
+        elif "Time" in element_type:
+            return GD['G_TIME']
+        elif "Instructor" in element_type:
+            return GD['G_INSTRUCTOR']
+        H.say("ERROR", "Unsupported type to get_gene(): ", element_type)
+
+    @staticmethod
+    def check_domain(course, element_type, element):
+        """
+        Helper to check if an element is in the domain of a course, see
+        compile_domains().
+
+        :param course: course ID
+        :param element_type: 'Facility ID', 'Time Slot' or instructor
+        :param element: room, time slot or instructor ID
+        :return: True if the course can be given the element
+        """
+        if "Facility" in element_type:
+            domain = GD['C_R_MASK'][course]
+        elif "Time" in element_type:
+            domain = GD['C_T_MASK'][course]
+        elif "Instructor" in element_type:
+            domain = GD['C_I_MASK'][course]
+        else:
+            H.say("ERROR", "Unsupported type to check_domain(): ",
+                  element_type)
+        return bool(domain >> element & 1)
+
+    @staticmethod
+    def execute_management(resource_type, index, resource, time, mode):
         """
         Wrapper method to make error checking modular and re-usable
 
         :param resource_type:
         :param index:
         :param resource:
-        :param day:
         :param time:
         :param mode:
         :return:
         """
-        # Variables
-        return_value = False
-
         # Check for a valid mode.
         if not ("free" in mode or "book" in mode):
             H.say("ERROR", "Invalid mode passed to execute_management(): ",
                   mode)
         # Check that the resource actually exists
-        if resource not in GD[resource_type][index]:
+        if not 0 <= resource < len(GD[resource_type][index]):
             H.say("ERROR", "Trying to ", mode,
                   " resource that doesn't exist: ", resource)
 
-        # Book or free the resource, based on input mode
+        # Book or free the resource, based on input mode. The free index
+        # of the solution has a bitmask of free resources per time slot,
+        # it changes at every slot that overlaps the booked one.
+        slot_bit = 1 << time
+        resource_bit = 1 << resource
+        calendar = GD[resource_type][index]
+        free_index = GD[GD['FREE_INDEX'][resource_type]][index]
         if "book" in mode:
-            if day not in GD[resource_type][index][resource]:
-                GD[resource_type][index][resource][day] = []
-            GD[resource_type][index][resource][day].append(time)
-            return_value = True
-        else:
-            if day not in GD[resource_type][index][resource]:
-                H.say("DBG", "tried to free resource ", resource,
-                      " on(", day, ") @ ", time, " but that day\n",
-                      "is fully open, better check.")
-                return return_value
-            if time in GD[resource_type][index][resource][day]:
-                GD[resource_type][index][resource][day].remove(time)
-            else:
-                H.say("DBG", "tried to free resource ", resource,
-                      " on ", time, " but it's already free")
-                return_value = False
-            if len(GD[resource_type][index][resource][day]) == 0:
-                # Delete this entry so "check" runs faster
-                del GD[resource_type][index][resource][day]
-                return_value = True
-        return return_value
+            calendar[resource] |= slot_bit
+            for t in GD['T_CONFLICT_LIST'][time]:
+                free_index[t] &= ~resource_bit
+            return True
+        if not calendar[resource] & slot_bit:
+            H.say("DBG", "tried to free resource ", resource,
+                  " on ", time, " but it's already free")
+            return False
+        calendar[resource] &= ~slot_bit
+        for t in GD['T_CONFLICT_LIST'][time]:
+            if not calendar[resource] & GD['T_CONFLICTS'][t]:
+                free_index[t] |= resource_bit
+        return True
 
     @staticmethod
     def get_course_name(course):
@@ -828,203 +1685,397 @@ class H:
         return GD['C'][course]['*Section']
 
     @staticmethod
-    def get_random_number(hash_key):
+    def get_courses_taught(instructor):
         """
-        method to generate a random number that will be between 0 and
-        the length of the hash that we will use the number to pull an
-        element from
-        :param hash_key:
-        :return random_number:
+        Helper to split the free text "Courses Taught" of an instructor into
+        exact course names.
+
+        :param instructor: key from GD['IC'] hash
+        :return: list of names, e.g. ['CS 122', 'CS 480']
         """
-        import random
-        max_num = len(GD[hash_key])
-        return random.randrange(0, max_num, 1)
+        courses = []
+        for course_name in GD['IC'][instructor]['Courses Taught'].split(','):
+            course_name = ' '.join(course_name.split())
+            if course_name != '':
+                courses.append(course_name)
+        return courses
 
     @staticmethod
-    def get_random_course(hash_key, entry):
+    def get_key(code, element_id):
         """
-        method to get a random course from a solution dict
-        Designed for use with cull_population
+        Helper to turn a compiled ID back into its string key, for messages
+        and export.
+
+        :param code: 'C', 'R', 'I' or 'T'
+        :param element_id:
+        :return: key, or empty string for -1
         """
-        import random
-        counter = 0
-        max_num = len(GD[hash_key][entry])
-        key_num = random.randrange(0, max_num, 1)
-        for course in GD[hash_key][entry]:
-            if key_num == counter:
-                return course
-            else:
-                counter += 1
-        # Error if we reach this point
-        H.say("ERROR", "Unable to find a random course key for ", hash_key)
+        if element_id == -1:
+            return ""
+        return GD[code + '_KEYS'][element_id]
 
     @staticmethod
-    def get_random_element(key, course):
+    def initialize_calendars(solution):
         """
-        method to randomly get an element off 'R', 'T' or 'I' dict. Does
-        not check if the element is free or not.
+        Helper to give a new solution an empty genome (all -1), empty
+        room and instructor calendars and free indexes with everything
+        free, see make_assignment() and manage_resource().
 
-        Designed for use with generate_random_solutions and mutate.
-
-        :param key:
-        :param course:
-        :return: element
+        :param solution: number key for the solution on GD['S'] dict
+        :return:
         """
-        H.say("DBG", "get_random_element() in: ", key)
-        import sys
-        import random
-        counter = 0
-        # Skip the random vs counter loop for instructors, since we will pull
-        # them off of a hash directly and randomly assign one of them
-        if 'I' in key:
-            r_n = 0
-        else:
-            r_n = H.get_random_number(key)
-        e_id = ""  # for error message printing only
-        for element_id in GD[key]:
-            e_id = element_id
-            if counter == r_n:
-                # Pull an instructor randomly from a qualified pool
-                if 'I' in key:
-                    pool = GD['C'][course]['Instructors']
-                    pool_size = len(pool)
-                    name = H.get_course_name(course)[0]
-                    H.say("DBG", "get_random_element() pool: ", pool)
-                    if pool_size < 1:
-                        H.say("ERROR", "No instructors for: ", name)
-                    elif pool_size == 1:
-                        element_id = pool[0]
-                    else:
-                        i_random = random.randrange(0, pool_size)
-                        element_id = pool[i_random]
-                    H.say("DBG", "get_random_element() out(I): ", element_id)
-                    return element_id
-                elif 'R' in key:
-                    H.say("DBG", "get_random_element() out(R): ", element_id)
-                    return element_id
-                elif 'T' in key:
-                    H.say("DBG", "get_random_element() out(T): ", element_id)
-                    return element_id
-                else:
-                    H.say("ERROR", "get_random_element() invalid key: ", key)
-            else:
-                counter += 1
-
-        # If we reach this point, a problem occurred, exit with info
-        H.say(
-            "ERROR",
-            "Not able to find a random element from ",
-            key, "\n",
-            "dict, this means all possibilities were already assigned\n",
-            "There aren't enough of one of the following:\n",
-            "day/time slots, instructors, or rooms\n\n",
-            "Was trying: \n",
-            e_id,
-        )
-        sys.exit(2)
+        GD['S'][solution] = array.array('h', [-1]) * (3 * len(GD['C_KEYS']))
+        GD['RT'][solution] = [0] * len(GD['R_KEYS'])
+        GD['IT'][solution] = [0] * len(GD['I_KEYS'])
+        num_slots = len(GD['T_KEYS'])
+        GD['RF'][solution] = [(1 << len(GD['R_KEYS'])) - 1] * num_slots
+        GD['IF'][solution] = [(1 << len(GD['I_KEYS'])) - 1] * num_slots
 
     @staticmethod
-    def get_random_course_element():
+    def initialize_penalties(solution):
         """
-        Helper method to randomly return either "Facility ID" or "Time Slot"
+        Helper to score every course of a complete solution from the
+        FIT_* tables (see compile_fitness()) and keep the result, so moves
+        after this only rescore the courses they touch, see
+        update_penalty(). fitness() then reads the total.
 
-        Designed for use with mutate() method
-        :return: element_code
+        PT[solution] = [total penalty, set of course IDs in a room that is
+                        too small, array of per-course penalties]
+
+        :param solution: number key for the solution on GD['S'] dict
+        :return:
         """
-        import random
-        number = random.randrange(0, 9, 1)
-        if number < 5:
-            element_code = "Facility ID"
-        else:
-            element_code = "Time Slot"
-        return element_code
+        GD['PT'][solution] = H.get_penalties(GD['S'][solution], GD)
 
     @staticmethod
-    def get_id(instructor_name):
+    def get_penalties(genome, tables):
         """
-        Takes 'Instructor Name' field and returns the equivalent
-        NAU Jan/Dana ID #
-        :param instructor_name: 'Palmer, James Dean'
-        :return: e.g. 'jdp85'
+        Helper to score every course of a genome, see initialize_penalties().
+
+        :param genome: genome array, or any sequence laid out the same way
+        :param tables: dict holding the FIT_* tables, GD or the shared
+                       copies of the fitness workers
+        :return: [total penalty, set of killed course IDs, penalties]
         """
-        H.say("DBG", "get_id() in: ", instructor_name)
-        try:
-            for key in GD['I']:
-                if GD['I'][key]['Instructor Name'][0] == instructor_name:
-                    H.say("DBG", "get_id() out: ", key)
-                    return key
-        except:
-            H.say("ERROR", "get_id(): Could not find Jan/Dana ID for: ",
-                  instructor_name)
+        num_courses = len(GD['C_KEYS'])
+        num_rooms = len(GD['R_KEYS'])
+        rooms = genome[GD['G_ROOM']:GD['G_ROOM'] + num_courses]
+        times = genome[GD['G_TIME']:GD['G_TIME'] + num_courses]
+        instructors = \
+            genome[GD['G_INSTRUCTOR']:GD['G_INSTRUCTOR'] + num_courses]
+        # Row of each course in FIT_ROOM
+        course_rooms = list(map(operator.add,
+                                range(0, num_courses * num_rooms, num_rooms),
+                                rooms))
+        instructor_rooms = [i * num_rooms + r
+                            for i, r in zip(instructors, rooms)]
+        penalties = array.array('l', map(
+            sum, zip(map(tables['FIT_ROOM'].__getitem__, course_rooms),
+                     map(tables['FIT_INSTRUCTOR'].__getitem__,
+                         instructor_rooms),
+                     map(tables['FIT_TIME'].__getitem__, times))
+        ))
+        killed = set(c for c in range(num_courses)
+                     if tables['FIT_KILL'][course_rooms[c]])
+        return [sum(penalties), killed, penalties]
 
     @staticmethod
-    def get_resource(rs_counter, course, time, code, cc_key):
+    def update_penalty(solution, course):
         """
-        Return a semi-randomly assigned resource (obeys constraints). If a
-        non-empty string is passed in for cc_key, then it will check for
-        forced assignments first before randomly assigning.
+        Helper to rescore one course of a solution after its room, time
+        slot or instructor changed, in constant time. The total is adjusted
+        by the difference, see initialize_penalties().
 
-        :param rs_counter:
-        :param course:
-        :param time:
-        :param code:
-        :param cc_key: key from the course constraints hash
+        :param solution: number key for the solution on GD['S'] dict
+        :param course: course ID
         :return:
         """
-        # Process inputs
-        if "I" in code:
-            r_type = 'I'
-            r_key1 = 'InstructorAssigned'
-            r_key2 = 'Instructor'
-            num_to_try = len(GD['C'][course]['Instructors'])
+        genome = GD['S'][solution]
+        num_rooms = len(GD['R_KEYS'])
+        room = genome[GD['G_ROOM'] + course]
+        course_room = course * num_rooms + room
+        instructor_room = \
+            genome[GD['G_INSTRUCTOR'] + course] * num_rooms + room
+        penalty = (GD['FIT_ROOM'][course_room] +
+                   GD['FIT_INSTRUCTOR'][instructor_room] +
+                   GD['FIT_TIME'][genome[GD['G_TIME'] + course]])
+        state = GD['PT'][solution]
+        state[0] += penalty - state[2][course]
+        state[2][course] = penalty
+        if GD['FIT_KILL'][course_room]:
+            state[1].add(course)
+        else:
+            state[1].discard(course)
+
+    @staticmethod
+    def get_fitness_key(solution):
+        """
+        Helper to get the fitness cache key of a solution, a SHA-1 digest of
+        its genome. Solutions with the same assignments get the same key no
+        matter which solution number they are stored under.
+
+        :param solution: number key for the solution on GD['S'] dict
+        :return: 20 byte digest
+        """
+        import hashlib
+        return hashlib.sha1(GD['S'][solution].tobytes()).digest()
+
+    @staticmethod
+    def get_cached_penalties(key):
+        """
+        Helper to look up the penalties of a genome on the fitness cache,
+        counts the hit or miss and marks a hit as the most recently used
+        entry. The cache only saves scoring a genome from scratch, see
+        get_penalties(), reading the score of a solution that has running
+        penalties is cheaper than hashing its genome.
+
+        :param key: see get_fitness_key()
+        :return: copy of the penalties, or None if they aren't cached
+        """
+        if key in GD['FITNESS_CACHE']:
+            GD['FITNESS_CACHE_HITS'] += 1
+            GD['FITNESS_CACHE'].move_to_end(key)
+            total, killed, penalties = GD['FITNESS_CACHE'][key]
+            return [total, set(killed), array.array('l', penalties)]
+        GD['FITNESS_CACHE_MISSES'] += 1
+        return None
+
+    @staticmethod
+    def cache_penalties(key, state):
+        """
+        Helper to store a copy of the penalties of a genome on the fitness
+        cache. Least recently used entries are evicted once the keys and
+        penalties take more than FITNESS_CACHE_MB, the size of the dict
+        itself isn't counted.
+
+        :param key: see get_fitness_key()
+        :param state: [total penalty, set of killed course IDs, penalties]
+        :return:
+        """
+        if key in GD['FITNESS_CACHE']:
+            return
+        total, killed, penalties = state
+        GD['FITNESS_CACHE'][key] = \
+            [total, frozenset(killed), array.array('l', penalties)]
+        GD['FITNESS_CACHE_BYTES'] += H.get_cache_entry_size(key, state)
+        max_bytes = GD['FITNESS_CACHE_MB'] * 1024 * 1024
+        while GD['FITNESS_CACHE_BYTES'] > max_bytes and GD['FITNESS_CACHE']:
+            old_key, old_state = GD['FITNESS_CACHE'].popitem(last=False)
+            GD['FITNESS_CACHE_BYTES'] -= \
+                H.get_cache_entry_size(old_key, old_state)
+
+    @staticmethod
+    def get_cache_entry_size(key, state):
+        """
+        Helper to cache_penalties(), bytes taken by one cache entry.
+
+        :param key: see get_fitness_key()
+        :param state: [total penalty, set of killed course IDs, penalties]
+        :return: size in bytes
+        """
+        import sys
+        return (sys.getsizeof(key) + sys.getsizeof(state[0]) +
+                sys.getsizeof(state[1]) + sys.getsizeof(state[2]))
+
+    @staticmethod
+    def get_random_number(hash_key):
+        """
+        method to generate a random number that will be between 0 and
+        the length of the hash that we will use the number to pull an
+        element from
+        :param hash_key:
+        :return random_number:
+        """
+        import random
+        max_num = len(GD[hash_key])
+        return random.randrange(0, max_num, 1)
+
+    @staticmethod
+    def get_solution_seed(base_seed, name):
+        """
+        Helper to derive the seed of an independent random stream, e.g.
+        for one solution of the initial population.
+
+        :param base_seed: integer seed of the run
+        :param name: solution number or other name of the stream
+        :return: string seed for random.seed()
+        """
+        return str(base_seed) + ":" + str(name)
+
+    @staticmethod
+    def get_blocked_slots(calendar):
+        """
+        Helper to turn a resource calendar into the bitmask of time slots
+        the resource can't take any more, the slots that overlap one it is
+        booked for. Overlap is symmetric, so this is the OR of the
+        T_CONFLICTS rows of the booked slots.
+
+        :param calendar: bitmask of booked time slot IDs
+        :return: bitmask of blocked time slot IDs
+        """
+        blocked = 0
+        while calendar:
+            low = calendar & -calendar
+            calendar ^= low
+            blocked |= GD['T_CONFLICTS'][low.bit_length() - 1]
+        return blocked
+
+    @staticmethod
+    def get_random_course(hash_key, entry):
+        """
+        method to get a random course from a solution dict
+        Designed for use with cull_population
+
+        Course IDs are dense, so this is just a number from 0 up to
+        the number of courses.
+        """
+        import random
+        max_num = len(GD['C_KEYS'])
+        if entry not in GD[hash_key] or max_num == 0:
+            H.say("ERROR", "Unable to find a random course key for ",
+                  hash_key)
+        return random.randrange(0, max_num, 1)
+
+    @staticmethod
+    def get_random_element(key, course):
+        """
+        method to randomly get an element ID for 'R', 'T' or 'I' from the
+        domain of the course, see compile_domains(). Does not check if the
+        element is free or not.
+
+        Designed for use with generate_random_solutions and mutate.
+
+        :param key:
+        :param course: course ID
+        :return: element ID
+        """
+        H.say("DBG", "get_random_element() in: ", key)
+        import random
+        # Pull an instructor from the qualified pool, rooms and time slots
+        # from the domain of the course
+        if 'I' in key:
+            pool = GD['C_INSTRUCTORS'][course]
+            if not pool:
+                name = H.get_course_name(GD['C_KEYS'][course])[0]
+                H.say("ERROR", "No instructors for: ", name)
+        elif 'R' in key:
+            pool = GD['C_ROOMS'][course]
+        elif 'T' in key:
+            pool = GD['C_TIMES'][course]
+        else:
+            H.say("ERROR", "get_random_element() invalid key: ", key)
+            return
+        H.say("DBG", "get_random_element() pool: ", pool)
+
+        # If this happens, exit with info
+        if not pool:
+            H.say(
+                "ERROR",
+                "Not able to find a random element from ",
+                key, "\n",
+                "dict, there aren't enough of one of the following:\n",
+                "day/time slots, instructors, or rooms\n\n",
+            )
+        element_id = pool[random.randrange(0, len(pool))]
+        H.say("DBG", "get_random_element() out(", key, "): ", element_id)
+        return element_id
+
+    @staticmethod
+    def get_random_bit(mask):
+        """
+        Helper to pick one of the set bits of a bitmask at random, e.g. a
+        free room from the free index of a slot.
+
+        :param mask: non-zero bitmask
+        :return: bit number
+        """
+        import random
+        for i in range(random.randrange(bin(mask).count('1'))):
+            mask &= mask - 1
+        return (mask & -mask).bit_length() - 1
+
+    @staticmethod
+    def get_random_course_element():
+        """
+        Helper method to randomly return either "Facility ID" or "Time Slot"
+
+        Designed for use with mutate() method
+        :return: element_code
+        """
+        import random
+        number = random.randrange(0, 9, 1)
+        if number < 5:
+            element_code = "Facility ID"
+        else:
+            element_code = "Time Slot"
+        return element_code
+
+    @staticmethod
+    def get_id(instructor_name):
+        """
+        Takes 'Instructor Name' field and returns the equivalent
+        NAU Jan/Dana ID #, by way of the GD['I_NAMES'] index
+        :param instructor_name: 'Palmer, James Dean'
+        :return: e.g. 'jdp85'
+        """
+        H.say("DBG", "get_id() in: ", instructor_name)
+        if instructor_name not in GD['I_NAMES']:
+            H.say("ERROR", "get_id(): Could not find Jan/Dana ID for: ",
+                  instructor_name)
+        H.say("DBG", "get_id() out: ", GD['I_NAMES'][instructor_name])
+        return GD['I_NAMES'][instructor_name]
+
+    @staticmethod
+    def get_resource(rs_counter, course, time, code, forced):
+        """
+        Return a semi-randomly assigned resource (obeys constraints), free
+        at the time slot and in the domain of the course. If forced is
+        True, then it will check for forced assignments first before
+        randomly assigning.
+
+        :param rs_counter:
+        :param course: course ID
+        :param time: time slot ID
+        :param code:
+        :param forced: True to apply the CourseConstraints of the course
+        :return: resource ID, -1 if none is available
+        """
+        # Process inputs
+        if "I" in code:
+            r_type = 'I'
             check_code = 'IT'
         elif "R" in code:
             r_type = 'R'
-            r_key1 = 'RoomAssigned'
-            r_key2 = 'Room'
-            num_to_try = len(GD['R'])
             check_code = 'RT'
         else:
             H.say("ERROR", "get_resource() was passed unknown type: ", code)
             return
 
         # Variables
-        resource = ""
+        resource = -1
 
         # Forced assignments first
-        if cc_key != "":
+        if forced:
             resource = H.make_forced_assignment(rs_counter,
                                                 course,
                                                 time,
-                                                r_type,
-                                                cc_key
+                                                r_type
                                                 )
 
-        # Iterate until available resource found
-        if resource == "":
-            flag = False
-            try_counter = 0
-            while not flag:
-                if try_counter == num_to_try:
-                    H.say("DBG", "all ", r_type, " busy at ", time)
-                    return ""
-                    break
-                resource = H.get_random_element(code, course)
-                flag = H.manage_resource(check_code,
-                                         rs_counter,
-                                         resource,
-                                         time,
-                                         "check"
-                                         )
-                try_counter += 1
-        else:
-            flag = True
+        # Pick at random from the free index
+        if resource == -1:
+            free = GD[GD['FREE_INDEX'][check_code]][rs_counter][time]
+            if r_type == 'I':
+                free &= GD['C_I_MASK'][course]
+            else:
+                free &= GD['C_R_MASK'][course]
+            if not free:
+                H.say("DBG", "all ", r_type, " busy at ", time)
+                return -1
+            resource = H.get_random_bit(free)
 
-        if flag:
-            H.say("DBG", "get_resources() returning ", r_type, " : ", resource)
-            return resource
-        else:
-            return ""
+        H.say("DBG", "get_resources() returning ", r_type, " : ", resource)
+        return resource
 
     @staticmethod
     def get_time(time):
@@ -1042,21 +2093,32 @@ class H:
 
         return numerical_time
 
+    @staticmethod
+    def get_minutes(time):
+        """
+        Helper to convert 24hr time into minutes since midnight.
+
+        :param time: time in 24hr format, e.g. 8:50, 13:00
+        :return: integer minutes, e.g. 530, 780
+        """
+        components = time.split(':')
+        if len(components) != 2:
+            H.say("ERROR", "trying to convert invalid input time: ", time)
+
+        return int(components[0]) * 60 + int(components[1])
+
     @staticmethod
     def get_time_slot(solution, course):
         """
-        Helper to get a random time slot and assign the course to it
-        within the given solution number.
+        Helper to get a random time slot for the course within the given
+        solution number.
 
         :param solution: key from GD['S'] hash
         :param course: key from GD['S'][solution] hash
-        :return:
+        :return: time slot ID
         """
         H.say("DBG", "get_time_slot() in: ", solution, ":", course, ":")
         time = H.get_random_element('T', course)
-#        for t_key in GD['T'][time]:
-#            GD['S'][solution][course][t_key] = GD['T'][time][t_key]
-#        GD['S'][solution][course]['Time Slot'] = time
         H.say("DBG,", "get_time_slot() out: ", time)
         return time
 
@@ -1081,264 +2143,268 @@ class H:
         Helper method to assign the given resource at a given time for the
         given course within the solution.
 
+        A solution is a genome, one flat array of IDs:
+        GD['S'][solution][GD['G_ROOM'] + course] = room ID
+        GD['S'][solution][GD['G_TIME'] + course] = time slot ID
+        GD['S'][solution][GD['G_INSTRUCTOR'] + course] = instructor ID
+        The course/instructor/room/time parameters are filled back in by
+        get_export_row().
+
         :param solution:
-        :param course:
-        :param resource:
-        :param time:
+        :param course: course ID
+        :param resource: instructor or room ID
+        :param time: time slot ID
         :param mode:
         :return:
         """
-        # Instructor + ( time + course params <- only do these once)
+        genome = GD['S'][solution]
+        # Instructor + time
         if "instructor" in mode:
-            # Course params
-            for c_param in GD['C_PARAMS']:
-                GD['S'][solution][course][c_param] = GD['C'][course][c_param]
-
-            # Instructor params
-            for i_key in GD['I'][resource]:
-                GD['S'][solution][course][i_key] \
-                    = GD['I'][resource][i_key]
-            GD['S'][solution][course]['Instructor Building'] = \
-                GD['IC'][resource]['Instructor Building']
+            genome[GD['G_INSTRUCTOR'] + course] = resource
             H.say("DBG", " resource: ", resource)
             H.manage_resource('IT', solution, resource,
                               time, "book")
-
-            # Time
-            if time not in GD['T']:
-                name = GD['C'][course]['Class Subject + Nbr']
-                section = GD['C'][course]['*Section']
-                H.say("ERROR", "Trying to assign non-existent time slot ",
-                      time, " for course: ", name, " section: ", section,
-                      "\nAre you forcing ",
-                      "invalid constraint in CourseConstraints?"
-                      )
-            for t_key in GD['T'][time]:
-                GD['S'][solution][course][t_key] = GD['T'][time][t_key]
-            GD['S'][solution][course]['Time Slot'] = time
+            genome[GD['G_TIME'] + course] = time
 
         # Room
         if "room" in mode:
-            GD['S'][solution][course]['Facility ID'] \
-                = GD['R'][resource]['Facility ID']
-            GD['S'][solution][course]['Building'] \
-                = GD['RC'][resource]['Building']
-            GD['S'][solution][course]['Unit'] \
-                = GD['C'][course]['Unit']
+            genome[GD['G_ROOM'] + course] = resource
             H.manage_resource('RT', solution, resource, time, "book")
 
     @staticmethod
-    def make_forced_assignment(solution, course, time, db_type, cc_key):
+    def make_forced_assignment(solution, course, time, db_type):
         """
-        Helper method to get_resource, this one takes a key
-        from the GD['C'] courses hash and a type of assignment ('I', 'R', etc)
-        and propagates forced assignment if one was made by CSV constraint
+        Helper method to get_resource, this one takes a course ID and a
+        type of assignment ('I', 'R', etc) and propagates forced assignment
+        if one was made by CSV constraint. The constraints were resolved
+        to IDs by compile_problem().
 
         :param solution:
-        :param course:
-        :param time:
+        :param course: course ID
+        :param time: time slot ID
         :param db_type:
-        :param cc_key: key from CourseConstraint dict, saves us a loop
-        :return:
+        :return: resource ID, -1 if nothing is forced
         """
         H.say("DBG", "make_forced_assignment() in: ",
-              solution, ":", course, ":", time,
-              ":", db_type, ":", cc_key)
-        forced = 0
-        if cc_key in GD['CC']:
-            forced += 1
-            cc_course = GD['CC'][cc_key]['Course']
-
-            # Deal with instructors
-            if db_type == "I":
-                instructor = H.get_id(GD['CC'][cc_key]['Instructor'])
-                flag = H.manage_resource('IT',
-                                         solution,
-                                         instructor,
-                                         time,
-                                         "check"
-                                         )
-                # Error out if resource busy, this would indicate that
-                # constraints file has them double-booked.
-                if not flag:
-                    H.say("ERROR", "Trying to force assign busy resource:",
-                          instructor, " @ ", time,
-                          "\nCheck your CourseConstraints.")
-                GD['S'][solution][course]['InstructorForced'] = True
-                H.say("DBG", "make_forced_assignment()",
-                      "force assign instructor: ", instructor)
-                return instructor
-
-                # Deal with roms
-            if db_type == "R":
-                # Skip the case where course is assigned to instructor,
-                # but not to a room.
-                if 'Room' in GD['CC'][cc_key]:
-                    room = GD['CC'][cc_key]['Room']
-                    room_capacity = GD['RC'][room]['Capacity']
-                    course_capacity = GD['C'][course]['Enrollment Cap'][0]
-                    if int(course_capacity) > int(room_capacity):
-                        H.say("ERROR", "Trying to assign course ",
-                              cc_course, " with capacity ",
-                              course_capacity, " to room ",
-                              room, " but will be over room capacity(",
-                              room_capacity, ")!"
-                              )
-                    else:
-                        flag = H.manage_resource('RT',
-                                                 solution,
-                                                 room,
-                                                 time,
-                                                 "check"
-                                                 )
-                        # Error out if room not free
-                        GD['S'][solution][course]['RoomForced'] = True
-                        if not flag:
-                            H.say("ERROR",
-                                  "Trying to force assign busy room: ",
-                                  room, " @ ", time)
-                        # Else make the assignment'
-                        H.say("DBG", " force assign room: ", room)
-                        return room
-
-                # May need to support day/time assignment as well
+              solution, ":", course, ":", time, ":", db_type)
+
+        # Deal with instructors
+        if db_type == "I" and GD['C_FORCED_I'][course] != -1:
+            instructor = GD['C_FORCED_I'][course]
+            flag = H.manage_resource('IT',
+                                     solution,
+                                     instructor,
+                                     time,
+                                     "check"
+                                     )
+            # Error out if resource busy, this would indicate that
+            # constraints file has them double-booked.
+            if not flag:
+                H.say("ERROR", "Trying to force assign busy resource:",
+                      GD['I_KEYS'][instructor], " @ ", GD['T_KEYS'][time],
+                      "\nCheck your CourseConstraints.")
+            H.say("DBG", "make_forced_assignment()",
+                  "force assign instructor: ", instructor)
+            return instructor
+
+        # Deal with rooms, the capacity was checked by compile_problem().
+        # Skip the case where course is assigned to instructor,
+        # but not to a room.
+        if db_type == "R" and GD['C_FORCED_R'][course] != -1:
+            room = GD['C_FORCED_R'][course]
+            flag = H.manage_resource('RT',
+                                     solution,
+                                     room,
+                                     time,
+                                     "check"
+                                     )
+            # Error out if room not free
+            if not flag:
+                H.say("ERROR",
+                      "Trying to force assign busy room: ",
+                      GD['R_KEYS'][room], " @ ", GD['T_KEYS'][time])
+            # Else make the assignment'
+            H.say("DBG", " force assign room: ", room)
+            return room
+
+        # May need to support day/time assignment as well
 
         # If we fall through to here, no forced assignment needs to be made.
-        H.say("DBG", "make_forced_assignment() returning empty string")
-        return ""
+        H.say("DBG", "make_forced_assignment() returning -1")
+        return -1
 
     @staticmethod
     def manage_resource(resource_type, solution, resource, time, mode):
         """
         Assume "check" was performed before booking
 
+        The calendar of a resource is one integer per solution, bit n is
+        set while time slot ID n is booked:
+
+        GD['RT'][solution][room] = bitmask of booked time slot IDs
+        GD['IT'][solution][instructor] = same for instructors
+        GD['RF'][solution][time] = bitmask of the room IDs free at a slot
+        GD['IF'][solution][time] = same for instructors
+
+        So book/free set or clear one bit, and "check" masks the calendar
+        with the conflict row of the slot from compile_time_slots(). That
+        covers every day the slot meets on.
+
         :param resource_type: RT or IT
         :param solution: number key for the solution on GD['S'] dict
-        :param resource: room or instructor
-        :param time: time, in time slot format (MWF_08:00_09:15)
+        :param resource: room or instructor ID
+        :param time: time slot ID, of a slot like MWF_08:00_09:15
         :param mode: book, free, or check
         :return: True or False
         """
         H.say("DBG", "manage_resource() in: ", resource_type,
               ":", solution, ":", resource, ":", time, ":", mode)
 
+        # "Check" requests, the resource is free if nothing booked
+        # overlaps the requested slot.
+        if mode == "check":
+            busy = GD[resource_type][solution][resource] \
+                & GD['T_CONFLICTS'][time]
+            H.say("DBG", "manage_resource() returning ", not busy)
+            return not busy
+
         # Error checking on arguments.
         if not ('RT' in resource_type or 'IT' in resource_type):
             H.say("ERROR", "manage_resource() received illegal resource_type: ",
                   resource_type)
-        if not (mode == "free" or mode == "book" or mode == "check"):
+        if not (mode == "free" or mode == "book"):
             H.say("ERROR", "Invalid mode passed to manage_resource(): ",
                   mode)
 
-        # Atomize the time slot.
-        atoms = H.atomize_time_slot(time)
-        return_value = False  # Default false should get me looking in here
-
-        # Make sure requested time slot is valid.
-        if time not in GD['T']:
-            H.say("ERROR", "Can't find ", time,
-                  " as a valid time slot, are you forcing\n",
-                  "invalid constraint in CourseConstraints?"
+        # Handle the "Book" requests
+        if "book" in mode:
+            H.say("VERBOSE", "booking resource ", resource,
+                  " at time: ", time
                   )
+            return H.execute_management(resource_type, solution,
+                                        resource, time, "book")
 
-        # Process the request on each atom in the time slot.
-        for a in atoms:
-            a_elements = H.get_time_slot_elements(a)
-            day = a_elements[0]
-            start = H.get_time(a_elements[1])
-            end = H.get_time(a_elements[2])
-
-            # Handle the "Book" requests
-            if "book" in mode:
-                H.say("VERBOSE", "booking resource ", resource,
-                      " at time: ", a
-                      )
-                if H.execute_management(resource_type, solution,
-                                        resource, day, a, "book"
-                                        ):
-                    H.say("DBG", "manage_resource() returning True (busy)")
-                    return_value = True
-                else:
-                    H.say("ERROR", "Trying to book a busy resource!\n",
-                          resource, ":", time, ":", solution)
-            # end "Book"
-
-            # Handle the "Free" requests
-            elif "free" in mode:
-                H.say("VERBOSE", "freeing resource ", resource,
-                      " at time: ", a
-                      )
-                if H.execute_management(resource_type, solution,
-                                        resource, day, time, "free"
-                                        ):
-                    H.say("DBG", "manage_resource() returning True (free)")
-                    return_value = True
-                else:
-                    # This is just a temp sanity check, remove it.
-                    H.say("DBG", "Resource already free, better check:\n",
-                          resource, ":", time, ":", solution)
-            # End "free"
-
-            # "Check" requests
-            elif "check" in mode:
-                if day not in GD[resource_type][solution][resource]:
-                    return_value = True
-                    continue
-                else:
-                    # List of time_slots already booked for resource
-                    booked_times = GD[resource_type][solution][resource][day]
-                    for bt in booked_times:
-                        bt_elements = H.get_time_slot_elements(bt)
-                        bt_day = bt_elements[0]
-                        bt_start = H.get_time(bt_elements[1])
-                        bt_end = H.get_time(bt_elements[2])
-                        # enumerate the conditions over which a time slot
-                        # is equivalent
-                        c1 = ((start >= bt_start) and (start <= bt_end))
-                        c2 = ((end >= bt_start) and (end <= bt_end))
-                        c3 = ((start < bt_start) and (end > bt_end))
-                        if c1 or c2 or c3:
-                            H.say("DBG", "check busy: ", c1, "<>", c2,
-                                  "<>", c3, " a vs bt: ", a, " <> ", bt,
-                                  "\n   start: ", start, "    end:", end,
-                                  "\nbt_start: ", bt_start, " bt_end:", bt_end,
-                                  "\n     day: ", day, " bt_day: ", bt_day
-                                  )
-                            return_value = False
-                            break
-                        else:
-                            H.say("DBG", "free")
-                            return_value = True
+        # Handle the "Free" requests
+        H.say("VERBOSE", "freeing resource ", resource,
+              " at time: ", time
+              )
+        if H.execute_management(resource_type, solution,
+                                resource, time, "free"):
+            H.say("DBG", "manage_resource() returning True (free)")
+            return True
+        # This is just a temp sanity check, remove it.
+        H.say("DBG", "Resource already free, better check:\n",
+              resource, ":", time, ":", solution)
+        return False
 
-        if return_value:
-            H.say("DBG", "manage_resource() returning True")
-        else:
-            H.say("DBG", "manage_resource() returning False")
-        return return_value
+    @staticmethod
+    def manage_course(solution, course, mode):
+        """
+        Helper to book, free, or check the instructor and the room of an
+        assigned course at its time slot.
+
+        :param solution: number key for the solution on GD['S'] dict
+        :param course: course ID
+        :param mode: book, free, or check
+        :return: for "check", True if both are free
+        """
+        genome = GD['S'][solution]
+        time = genome[GD['G_TIME'] + course]
+        i_flag = H.manage_resource('IT', solution,
+                                   genome[GD['G_INSTRUCTOR'] + course],
+                                   time, mode)
+        r_flag = H.manage_resource('RT', solution,
+                                   genome[GD['G_ROOM'] + course],
+                                   time, mode)
+        return i_flag and r_flag
 
     @staticmethod
-    def swap_elements(index, p1_course, p2_course, swap_type):
+    def swap_elements(index, p1_course, p2_course, swap_type, check=True):
         """
         Swap elements on 'S' dict at given index if neither is a forced
-        assignment.
+        assignment, both elements are in the domain of the course they
+        go to, and the swap doesn't double-book the instructor or room of
+        either course. The calendars and penalties of the solution
+        are kept in step with the swap.
 
         :param index:
         :param p1_course:
         :param p2_course:
         :param swap_type:
+        :param check: False skips the domain check, for taking a swap back
+                      when a course had an element outside its domain
         :return: true if swapped
         """
-        c1 = H.check_forced(index, p1_course, swap_type)
-        c2 = H.check_forced(index, p2_course, swap_type)
+        c1 = H.check_forced(p1_course, swap_type)
+        c2 = H.check_forced(p2_course, swap_type)
         if c1 or c2:
             H.say("DBG", "s_e: skipping swap, one of elements was forced")
             return False
-        else:
-            temp = GD['S'][index][p1_course][swap_type]
-            GD['S'][index][p1_course][swap_type] = \
-                GD['S'][index][p2_course][swap_type]
-            GD['S'][index][p2_course][swap_type] = temp
-            return True
+        if p1_course == p2_course:
+            return False
+
+        genome = GD['S'][index]
+        g1 = H.get_gene(swap_type) + p1_course
+        g2 = H.get_gene(swap_type) + p2_course
+        if check and \
+                (not H.check_domain(p1_course, swap_type, genome[g2]) or
+                 not H.check_domain(p2_course, swap_type, genome[g1])):
+            H.say("DBG", "s_e: skipping swap, outside the course domain")
+            return False
+        H.manage_course(index, p1_course, "free")
+        H.manage_course(index, p2_course, "free")
+        genome[g1], genome[g2] = genome[g2], genome[g1]
+        swapped = H.manage_course(index, p1_course, "check")
+        if swapped:
+            H.manage_course(index, p1_course, "book")
+            swapped = H.manage_course(index, p2_course, "check")
+            H.manage_course(index, p1_course, "free")
+        if not swapped:
+            H.say("DBG", "s_e: skipping swap, resource would be busy")
+            genome[g1], genome[g2] = genome[g2], genome[g1]
+        H.manage_course(index, p1_course, "book")
+        H.manage_course(index, p2_course, "book")
+        if swapped:
+            H.update_penalty(index, p1_course)
+            H.update_penalty(index, p2_course)
+        return swapped
+
+    @staticmethod
+    def move_element(index, course, element_type, element, check=True):
+        """
+        Move a gene of a course on 'S' dict at given index to another
+        element if the gene isn't forced, the element is in the domain of
+        the course, and the instructor and room of the course are free
+        after the move. The calendars and penalties of the solution are
+        kept in step with the move.
+
+        :param index:
+        :param course: course ID
+        :param element_type: 'Facility ID' or 'Time Slot'
+        :param element: room or time slot ID
+        :param check: False skips the domain check, for moving a course
+                      back to an element outside its domain it had
+        :return: true if moved
+        """
+        if H.check_forced(course, element_type):
+            H.say("DBG", "m_e: skipping move, element was forced")
+            return False
+        genome = GD['S'][index]
+        gene = H.get_gene(element_type) + course
+        if genome[gene] == element or \
+                (check and not H.check_domain(course, element_type, element)):
+            return False
+        original = genome[gene]
+        H.manage_course(index, course, "free")
+        genome[gene] = element
+        moved = H.manage_course(index, course, "check")
+        if not moved:
+            H.say("DBG", "m_e: skipping move, resource would be busy")
+            genome[gene] = original
+        H.manage_course(index, course, "book")
+        if moved:
+            H.update_penalty(index, course)
+        return moved
 
 
 #######################################################################
@@ -1354,13 +2420,17 @@ class Population:
     @staticmethod
     def initialize_resources():
         """
-        Method to initialize the GD['RT'] and GD['IT'] data structures, which
-        contain an enumeration of all time slots for each room and
-        instructor, respectively.
-
-        Values are "busy" and "free". As each resource (room/instructor) is
-        assigned, it is marked busy/free in this structure so that no
-        duplicate resource assignments are made.
+        Method to prepare the resources for the GD['RT'] and GD['IT']
+        calendars, which track the booked time slots of each room and
+        instructor, respectively, see manage_resource(). As each resource
+        (room/instructor) is assigned, it is marked busy/free in them so
+        that no duplicate resource assignments are made.
+
+        Builds the instructor indexes:
+        I_NAMES = 'Instructor Name' -> Jan/Dana ID, used by get_id()
+        QUALIFIED_I = course name -> Jan/Dana IDs of instructors whose
+                      "Courses Taught" lists it. The list is split into
+                      exact names, so CS 122 no longer matches CS 122L.
 
         :return:
         """
@@ -1376,23 +2446,32 @@ class Population:
 
         # Create any IT/RT style tables here, if needed.
 
-        # Check and make sure that all offered courses will have instructors
-        courses_taught = ""
-        courses_not_taught = collections.defaultdict()
-        error_count = 0
+        # Index instructors by name and by the courses they teach so that
+        # get_id() and the qualified instructor pools are direct lookups.
+        GD['I_NAMES'] = {}
+        for i in GD['I']:
+            GD['I_NAMES'].setdefault(GD['I'][i]['Instructor Name'][0], i)
+        GD['QUALIFIED_I'] = collections.OrderedDict()
         H.say("VERBOSE", "\nCourses taught:")
         for ic in GD['IC']:
-            courses_taught += (GD['IC'][ic]['Courses Taught'])
             H.say("VERBOSE", GD['IC'][ic]['Courses Taught'])
+            for course_name in H.get_courses_taught(ic):
+                if course_name not in GD['QUALIFIED_I']:
+                    GD['QUALIFIED_I'][course_name] = []
+                if ic not in GD['QUALIFIED_I'][course_name]:
+                    GD['QUALIFIED_I'][course_name].append(ic)
+
+        # Check and make sure that all offered courses will have instructors
+        courses_not_taught = collections.defaultdict()
+        error_count = 0
         H.say("VERBOSE", "\nCourses offered:")
         for c in GD['C']:
             offered = GD['C'][c]['Class Subject + Nbr'][0]
             H.say("VERBOSE", offered, " section: ",
                   GD['C'][c]['*Section'])
-            if courses_taught.find(offered) == -1:
+            if offered not in GD['QUALIFIED_I']:
                 courses_not_taught[offered] = ""
                 error_count += 1
-            GD['C'][c]['Instructors'] = []  # initialize a string for later
         H.say("VERBOSE", "\n")
         if error_count:
             H.say("INFO", "These offered courses have no instructor\n",
@@ -1407,13 +2486,7 @@ class Population:
         # direct lookup of instructors during instructor assignment.
         for c in GD['C']:
             c_name = H.get_course_name(c)[0]
-            for i in GD['IC']:
-                courses = GD['IC'][i]['Courses Taught']
-                # Don't know how to do lookup between c_name and c directly
-                # so do this the long way.
-                if courses.find(c_name) != -1:
-                    GD['C'][c]['Instructors'].append(i)
-
+            GD['C'][c]['Instructors'] = list(GD['QUALIFIED_I'][c_name])
     @staticmethod
     def pre_order_courses():
         """
@@ -1501,293 +2574,1381 @@ class Population:
           resources because now, simply making the assignment and booking
           over top of any other assignment, so think about how to manage this
 
-        :return:
+        :return:
+        """
+        import random
+        H.say("INFO", "Generating set of random solutions...")
+        if GD['INITIALIZER'] not in ["DSATUR", "RANDOM"]:
+            H.say("ERROR", "Unsupported INITIALIZER: ", GD['INITIALIZER'])
+
+        # Every solution gets its own random stream, seeded from one draw
+        # of the main stream, so they can be built in any order or process
+        # and a seeded run still comes out the same
+        base_seed = random.randrange(2 ** 31)
+        if GD['GENERATE_WORKERS'] > 1 and H.can_fork("GENERATE_WORKERS"):
+            Population.generate_parallel(base_seed)
+        else:
+            for solution in range(GD['POPULATION']):
+                random.seed(H.get_solution_seed(base_seed, solution))
+                Population.generate_solution(solution)
+        # The GA continues on a stream of its own, the same either way
+        random.seed(H.get_solution_seed(base_seed, "evolve"))
+
+        H.say("INFO", "Done, generated ", len(GD['S']), " solutions.")
+
+    @staticmethod
+    def generate_solution(solution):
+        """
+        Helper to generate_random_solutions(), builds one random solution
+        with the courses that are forced to a room and time slot placed
+        first. The other forced genes are domains of one element, see
+        compile_domains(), so the rest of those courses are placed like
+        any other course.
+
+        :param solution: number key for the solution on GD['S'] dict
+        :return:
+        """
+        # Iterate over all course constraints and make assignments so that
+        # the constraints reserve their place in the solution.
+        num_courses = len(GD['C_KEYS'])
+        H.say("LOG", "creating solution [", solution, "]")
+        H.initialize_calendars(solution)
+        assigned = [False] * num_courses
+        num_forces = 0
+        pinned = GD['FIXED_ROOM'] | GD['FIXED_TIME']
+        # First loop over all course constraints
+        for course in range(num_courses):
+            instructor = -1
+            room = -1
+            time = -1
+            if GD['C_FIXED'][course] & pinned == pinned:
+                H.say("DBG", "found constraint(s) for: ",
+                      GD['C_KEYS'][course])
+                time = GD['C_FORCED_T'][course]
+                H.say("DBG", "force time slot: ", time)
+                # This will get forced assignments.
+                instructor = H.get_resource(solution,
+                                            course,
+                                            time,
+                                            'I',
+                                            True
+                                            )
+                if instructor == -1:
+                    H.say("ERROR", "Instructor force error")
+                # This will get forced assignments.
+                room = H.get_resource(solution,
+                                      course,
+                                      time,
+                                      'R',
+                                      True
+                                      )
+                if room == -1:
+                    H.say("ERROR", "Room force error")
+                    break
+
+            # Make the actual assignment
+            if instructor != -1 and room != -1:
+                H.say("DBG", "making forced assignments for ",
+                      instructor, ":", room, ":", time)
+                H.make_assignment(solution,
+                                  course,
+                                  instructor,
+                                  time,
+                                  "instructor"
+                                  )
+                H.make_assignment(solution,
+                                  course,
+                                  room,
+                                  time,
+                                  "room"
+                                  )
+                num_forces += 1
+                assigned[course] = True
+        H.say("DBG", "Made ", num_forces, " forced assignments")
+
+        # Place the rest most constrained first
+        if GD['INITIALIZER'] == "DSATUR":
+            Population.construct_solution(solution, assigned)
+
+        # Second loop over all remaining unassigned courses, smallest
+        # domain first
+        by_domain = sorted(range(num_courses),
+                           key=lambda c: len(GD['C_TIMES'][c]) *
+                           len(GD['C_ROOMS'][c]))
+        for course in by_domain:
+            if not assigned[course]:
+                H.say("DBG", "\nRandomly assigning course: ",
+                      GD['C_KEYS'][course])
+                instructor, room, time = \
+                    Population.get_random_assignment(solution,
+                                                     course,
+                                                     False)
+                # Make the actual assignment
+                if instructor != -1 and room != -1:
+                    H.make_assignment(solution,
+                                      course,
+                                      instructor,
+                                      time,
+                                      "instructor"
+                                      )
+                    H.make_assignment(solution,
+                                      course,
+                                      room,
+                                      time,
+                                      "room"
+                                      )
+                    assigned[course] = True
+
+                else:
+                    # Exit with message
+                    course_key = GD['C_KEYS'][course]
+                    H.help(2, course_key,
+                           H.get_key('I', instructor),
+                           H.get_key('R', room),
+                           H.get_course_name(course_key),
+                           H.get_course_section(course_key))
+        H.initialize_penalties(solution)
+
+    @staticmethod
+    def construct_solution(solution, assigned):
+        """
+        Helper to generate_solution(), a DSATUR style constructor for the
+        courses that aren't assigned yet. It repeatedly places the course
+        with the fewest time slots of its domain left where a qualified
+        instructor and a room of its domain are both free, harder courses
+        by C_DIFFICULTY first on a tie. The course goes in the slot that
+        takes the fewest other slots away from its instructor, in the
+        smallest free room of its domain. Remaining ties are broken
+        randomly to keep the population diverse.
+
+        Only when its domain has no free slot left does the course leave
+        it, never for a forced room or slot: first for any slot and any
+        room big enough for its 'Enrollment Cap', dropping the lab and
+        unit filters, then for the largest free room, see
+        get_fallback_rooms(). It exits like get_random_assignment() if not
+        even that works.
+
+        :param solution: number key for the solution on GD['S'] dict
+        :param assigned: list of True/False by course ID, updated
+        :return:
+        """
+        import random
+        conflicts = GD['T_CONFLICTS']
+        all_slots = (1 << len(GD['T_KEYS'])) - 1
+        # Slots each instructor and room can't take any more
+        i_blocked = [H.get_blocked_slots(calendar)
+                     for calendar in GD['IT'][solution]]
+        r_blocked = [H.get_blocked_slots(calendar)
+                     for calendar in GD['RT'][solution]]
+        unplaced = [c for c in range(len(GD['C_KEYS'])) if not assigned[c]]
+        # Slots where one of its instructors is free, by course, and the
+        # unplaced courses of each instructor
+        instructor_free = {}
+        i_courses = collections.defaultdict(list)
+        for c in unplaced:
+            instructor_free[c] = 0
+            for i in GD['C_INSTRUCTORS'][c]:
+                instructor_free[c] |= all_slots & ~i_blocked[i]
+                i_courses[i].append(c)
+        # Slots where one of its rooms is free, by room domain since many
+        # courses share one, and the domains of each room
+        room_free = {}
+        domain_rooms = {}
+        r_domains = collections.defaultdict(list)
+        for c in unplaced:
+            domain = GD['C_R_MASK'][c]
+            if domain in room_free:
+                continue
+            room_free[domain] = 0
+            domain_rooms[domain] = GD['C_ROOMS'][c]
+            for r in GD['C_ROOMS'][c]:
+                room_free[domain] |= all_slots & ~r_blocked[r]
+                r_domains[r].append(domain)
+        while unplaced:
+            # Most saturated course, fewest slots left
+            best_key = None
+            ties = []
+            for c in unplaced:
+                free = instructor_free[c] & GD['C_T_MASK'][c] & \
+                    room_free[GD['C_R_MASK'][c]]
+                key = (bin(free).count('1'), GD['C_DIFFICULTY'][c])
+                if best_key is None or key < best_key:
+                    best_key = key
+                    ties = []
+                if key == best_key:
+                    ties.append((c, free))
+            course, course_free = ties[random.randrange(len(ties))]
+            rooms = GD['C_ROOMS'][course]
+            if not course_free:
+                # Leave the domain, but not a forced room or slot
+                fixed = GD['C_FIXED'][course]
+                for rooms in Population.get_fallback_rooms(course):
+                    for r in rooms:
+                        course_free |= all_slots & ~r_blocked[r]
+                    course_free &= instructor_free[course]
+                    if fixed & GD['FIXED_TIME']:
+                        course_free &= GD['C_T_MASK'][course]
+                    if course_free:
+                        break
+            if not course_free:
+                course_key = GD['C_KEYS'][course]
+                H.help(1, course_key,
+                       H.get_course_name(course_key),
+                       H.get_course_section(course_key))
+
+            # Least conflicting slot and instructor, the slots it takes away
+            # from other courses the instructor could still teach
+            best_cost = None
+            choices = []
+            while course_free:
+                low = course_free & -course_free
+                course_free ^= low
+                time = low.bit_length() - 1
+                for i in GD['C_INSTRUCTORS'][course]:
+                    if i_blocked[i] & low:
+                        continue
+                    taken = 0
+                    if len(i_courses[i]) > 1:
+                        taken = bin(conflicts[time] & ~i_blocked[i]).count('1')
+                    cost = (taken, GD['FIT_TIME'][time])
+                    if best_cost is None or cost < best_cost:
+                        best_cost = cost
+                        choices = []
+                    if cost == best_cost:
+                        choices.append((time, i))
+            time, instructor = choices[random.randrange(len(choices))]
+
+            # First free room in the order of rooms, the smallest one but
+            # for the last fallback, ties at random
+            candidates = []
+            for r in rooms:
+                if r_blocked[r] & (1 << time):
+                    continue
+                if candidates and \
+                        GD['RC'][GD['R_KEYS'][r]]['Capacity'] != \
+                        GD['RC'][GD['R_KEYS'][candidates[0]]]['Capacity']:
+                    break
+                candidates.append(r)
+            room = candidates[random.randrange(len(candidates))]
+
+            H.say("DBG", "constructing ", GD['C_KEYS'][course], ": ",
+                  instructor, ":", room, ":", time)
+            H.make_assignment(solution, course, instructor, time,
+                              "instructor")
+            H.make_assignment(solution, course, room, time, "room")
+            i_blocked[instructor] |= conflicts[time]
+            r_blocked[room] |= conflicts[time]
+            assigned[course] = True
+            unplaced.remove(course)
+            for i in GD['C_INSTRUCTORS'][course]:
+                i_courses[i].remove(course)
+            for c in i_courses[instructor]:
+                instructor_free[c] = 0
+                for i in GD['C_INSTRUCTORS'][c]:
+                    instructor_free[c] |= all_slots & ~i_blocked[i]
+            for domain in r_domains[room]:
+                room_free[domain] = 0
+                for r in domain_rooms[domain]:
+                    room_free[domain] |= all_slots & ~r_blocked[r]
+
+    @staticmethod
+    def get_fallback_rooms(course):
+        """
+        Helper to construct_solution(), the rooms a course whose domain is
+        full tries next, one list at a time. A room too small for the
+        'Enrollment Cap' can't seat the class, yet fitness() doesn't
+        penalize it: its room_util in compile_fitness() is negative, so it
+        takes neither the kill nor the wasted capacity penalty. So the
+        rooms big enough come first, smallest first to keep the wasted
+        capacity penalty down, and only then all rooms, largest first. A
+        forced room is never left.
+
+        :param course: course ID
+        :return: list of room ID lists
+        """
+        if GD['C_FIXED'][course] & GD['FIXED_ROOM']:
+            return [GD['C_ROOMS'][course]]
+        course_key = GD['C_KEYS'][course]
+        capacity = int(GD['C'][course_key]['Enrollment Cap'][0])
+        big_enough = [r for r in GD['R_BY_CAPACITY']
+                      if int(GD['RC'][GD['R_KEYS'][r]]['Capacity']) >=
+                      capacity]
+        return [big_enough, list(reversed(GD['R_BY_CAPACITY']))]
+
+    @staticmethod
+    def generate_parallel(base_seed):
+        """
+        Helper to generate_random_solutions(), builds the solutions on a
+        pool of GENERATE_WORKERS forked processes. Each worker seeds every
+        solution it builds from base_seed and the solution number, so the
+        result is the same as building them in order, and sends back the
+        genome. Calendars and penalties are rebuilt from it here.
+
+        :param base_seed: see get_solution_seed()
+        :return:
+        """
+        import multiprocessing
+        # Anything still buffered would be written again by every worker
+        sys.stdout.flush()
+        GD['LOGFILE'].flush()
+        context = multiprocessing.get_context('fork')
+        pool = context.Pool(GD['GENERATE_WORKERS'])
+        try:
+            genomes = pool.map(
+                Population.generate_worker,
+                [(base_seed, solution)
+                 for solution in range(GD['POPULATION'])],
+                chunksize=max(1, GD['POPULATION'] //
+                              (4 * GD['GENERATE_WORKERS']))
+            )
+        finally:
+            pool.close()
+            pool.join()
+        # fitness() comes next and scores them, on FITNESS_WORKERS if set
+        for solution, genome in enumerate(genomes):
+            if genome is None:
+                H.say("ERROR", "Could not generate solution ", solution)
+            Population.load_solution(solution, genome, False)
+
+    @staticmethod
+    def generate_worker(job):
+        """
+        Worker side of generate_parallel(), builds one solution and hands
+        back its genome, the worker keeps nothing.
+
+        :param job: (base seed, solution number)
+        :return: genome array, or None if generation gave up
+        """
+        import random
+        base_seed, solution = job
+        random.seed(H.get_solution_seed(base_seed, solution))
+        try:
+            Population.generate_solution(solution)
+        except SystemExit:
+            # H.say("ERROR") and H.help() exit, that would hang the pool
+            return None
+        genome = GD['S'].pop(solution)
+        for calendar in GD['CALENDARS']['S']:
+            del GD[calendar][solution]
+        del GD['PT'][solution]
+        return genome
+
+    @staticmethod
+    def get_random_assignment(solution, course, forced):
+        """
+        Helper to generate_random_solutions(), tries the time slots of the
+        course domain in random order until one is found where both an
+        instructor and a room are free.
+
+        Exits with a message once every time slot was tried.
+
+        :param solution:
+        :param course: course ID
+        :param forced: True to apply the CourseConstraints of the course
+        :return: (instructor, room, time) IDs
+        """
+        import random
+        times = list(GD['C_TIMES'][course])
+        random.shuffle(times)
+        for time in times:
+            H.say("DBG", " trying time: ", time)
+            instructor = H.get_resource(solution,
+                                        course,
+                                        time,
+                                        'I',
+                                        forced
+                                        )
+            if instructor == -1:
+                continue
+            room = H.get_resource(solution,
+                                  course,
+                                  time,
+                                  'R',
+                                  forced
+                                  )
+            if room != -1:
+                return instructor, room, time
+
+        # Exit with message
+        course_key = GD['C_KEYS'][course]
+        H.help(1, course_key,
+               H.get_course_name(course_key),
+               H.get_course_section(course_key))
+
+    # Method to check feasibility of a solution
+    # Might be able to skip this one if assignments are made as feasible
+    @staticmethod
+    def check_feasibility(hash_key, entry):
+        H.say("DBG", "Checking feasibility...")
+        for c in range(len(GD['C_KEYS'])):
+            print(c)
+
+    # Fitness function
+    @staticmethod
+    def fitness():
+        """
+        Method for evaluating the fitness of a given solution
+        creates GD['F'] dict with the number of the solution as the key
+        and the fitness score as a value, this makes it easy to traverse
+        the solutions based on fitness later
+
+        Scratch pad of ideas
+        --------------------
+        Fitness parameter hash details (could have multiple ways to configure)
+        - professor proximity of chosen room to department
+        - course proximity of chosen room to department
+        - what days professor teaches
+        - penalty for time of day, but a light penalty
+        - class/prereq
+        - class/coreg
+        - wasted capacity in rooms
+
+        - degree progression (need 2 spreadsheets that don't exist)
+          first one has class/prereq (this means you can teach)
+          another one has class/coreq
+        - number of classes taught by professor (hard constraint)
+        - no room/date/time/instructor conflicts (depends on how detailed
+          the solution generator is)
+        - professor workload (like how many people a class has,
+          how many courses professor teaches, etc)
+
+        Other ideas:
+        - departure from a previous schedule/solution?
+        - TODO - keep track of penalty metrics, a way to tell the user which
+          penalties are being imposed the most? Might help tailor constraints
+          with that info
+        :return:
+        """
+        H.say("LOG", "Evaluating fitness...")
+        total_fitness = 0
+        high_fitness = 0
+        high_fitness_index = 0
+        use_cache = GD['FITNESS_CACHE_MB'] > 0
+        scores = {}
+        keys = {}
+        unscored = []
+        for s in GD['S']:
+            # Penalties are kept up to date by the moves that change the
+            # genome, so the score of a solution with penalties is read in
+            # constant time. Only solutions without any, see
+            # generate_parallel(), get a full scoring.
+            if s in GD['PT']:
+                scores[s] = Population.score_penalties(GD['PT'][s])
+                continue
+
+            # Look the genome up on the fitness cache before scoring it
+            if use_cache:
+                keys[s] = H.get_fitness_key(s)
+                state = H.get_cached_penalties(keys[s])
+                if state is not None:
+                    GD['PT'][s] = state
+                    scores[s] = Population.score_penalties(state)
+                    continue
+            unscored.append(s)
+
+        if GD['EVALUATION_PORT'] is not None and unscored:
+            states = Population.evaluate_remote(unscored)
+        elif GD['FITNESS_WORKERS'] > 1 and unscored:
+            states = Population.evaluate_parallel(unscored)
+        else:
+            states = [H.get_penalties(GD['S'][s], GD) for s in unscored]
+        for s, state in zip(unscored, states):
+            GD['PT'][s] = state
+            scores[s] = Population.score_penalties(state)
+            if use_cache:
+                H.cache_penalties(keys[s], state)
+
+        for s in GD['S']:
+            score = scores[s]
+            H.say("VERBOSE", "Score for solution ", s, ": ", score)
+            # Store the key of the solution and it's fitness score on the
+            # 'F' dict so that they can be pulled off in sorted order
+            GD['F'][s]['fitness'] = score
+            total_fitness += score
+            if score > high_fitness:
+                high_fitness = max(score, high_fitness)
+                high_fitness_index = s
+        avg_fitness = round(total_fitness / len(GD['S']), 2)
+        GD['FITNESS_HISTORY'].append((high_fitness, avg_fitness))
+        GD['HIGH_FITNESS_INDEX'] = high_fitness_index
+        H.say("DBG", "HFI: ", GD['HIGH_FITNESS_INDEX'])
+        Population.update_elite(keys)
+
+        H.say("INFO", "Average fitness: ", avg_fitness,
+              " \n                 High: ", high_fitness)
+        if use_cache:
+            H.say("LOG", "Fitness cache: ", GD['FITNESS_CACHE_HITS'],
+                  " hits, ", GD['FITNESS_CACHE_MISSES'], " misses, ",
+                  len(GD['FITNESS_CACHE']), " entries")
+
+    @staticmethod
+    def score_penalties(state):
+        """
+        Helper to fitness(), scores one solution from its penalties, see
+        initialize_penalties().
+
+        :param state: [total penalty, set of killed course IDs, penalties]
+        :return: fitness score
+        """
+        total, killed, penalties = state
+
+        # instructor proximity check = 'Instructor Proximity'
+        # course proximity = 'Room Proximity'
+        # time of day = 'Time of day'
+        # class taught in same semester as prereq = 'Prereq'
+        # wasted capacity in rooms = 'Wasted Capacity'
+        score = GD['HIGH_SCORE'] - total
+
+        # kill the solution if the room isn't big enough, the score
+        # drops to 0 at that course and only later courses still take
+        # their penalties
+        # TODO: Also kill solutions that waste way too much
+        if killed:
+            score = -sum(penalties[max(killed) + 1:])
+
+        # instructor days taught = 'Instructor Days Taught'
+        # Simple version of check is to just count number of days
+        # instructed and add a penalty for each of them
+#        for i in GD['I']:
+
+        # instructor workload = 'Instructor Workload'
+        # count total number of students taught
+        workload = 0
+
+        return score
+
+    @staticmethod
+    def update_elite(keys):
+        """
+        Helper to fitness(), offers every scored solution to the elite
+        archive. GD['ELITE'] is a min-heap bounded to the larger of
+        ELITE_SIZE and NUM_SOLUTIONS_TO_RETURN, so a solution only gets
+        in, in O(log K), if it beats the worst elite. The archive holds
+        copies of distinct genomes, nothing that happens to the
+        population afterwards can change or lose them. On equal scores
+        the elite found first stays.
+
+        :param keys: genome keys of the solutions fitness() already has,
+                     see get_fitness_key()
+        :return:
+        """
+        import heapq
+        size = max(GD['ELITE_SIZE'], GD['NUM_SOLUTIONS_TO_RETURN'], 1)
+        elite = GD['ELITE']
+        for s in GD['S']:
+            score = GD['F'][s]['fitness']
+            if len(elite) == size and score <= elite[0][0]:
+                continue
+            key = keys.get(s) or H.get_fitness_key(s)
+            if key in GD['ELITE_KEYS']:
+                continue
+            GD['ELITE_ORDER'] += 1
+            entry = (score, -GD['ELITE_ORDER'], key,
+                     array.array('h', GD['S'][s]))
+            GD['ELITE_KEYS'].add(key)
+            if len(elite) < size:
+                heapq.heappush(elite, entry)
+            else:
+                GD['ELITE_KEYS'].discard(heapq.heapreplace(elite, entry)[2])
+
+    @staticmethod
+    def get_elite():
+        """
+        Helper to read the elite archive, see update_elite().
+
+        :return: list of (score, genome), best first
+        """
+        return [(score, genome) for score, order, key, genome in
+                sorted(GD['ELITE'], reverse=True)]
+
+    @staticmethod
+    def keep_elite():
+        """
+        Elitism, puts the best ELITE_SIZE solutions of the archive back on
+        the population in place of the last children of crossover(), so
+        selection and crossover can never lose them. mutate() leaves these
+        solutions alone, see GD['ELITE_INDEXES'].
+
+        At most half the population is given to elites.
+
+        :return:
+        """
+        elite = Population.get_elite()
+        count = min(len(elite), GD['ELITE_SIZE'], len(GD['S']) // 2)
+        slots = sorted(GD['S'])[len(GD['S']) - count:]
+        GD['ELITE_INDEXES'] = set(slots)
+        for solution, (score, genome) in zip(slots, elite):
+            Population.load_solution(solution, genome)
+        H.say("LOG", "Kept ", count, " elite solutions")
+
+    @staticmethod
+    def start_fitness_pool(num_rows):
+        """
+        Helper to evaluate_parallel(), starts FITNESS_WORKERS processes and
+        the shared memory they score from: copies of the FIT_* tables, a
+        block of genome rows and a block of per-course penalties and killed
+        flags per row. The workers are forked after the shared memory is
+        made, so they map the same memory and nothing but row numbers is
+        pickled per generation.
+
+        Main runs at import, so the workers have to be forked rather than
+        spawned, without fork this falls back to scoring serially.
+
+        :param num_rows: genome rows needed
+        :return: True if the pool is ready
+        """
+        import multiprocessing
+        num_courses = len(GD['C_KEYS'])
+        if GD['FITNESS_POOL'] is not None:
+            if len(GD['FITNESS_SHARED']['KILLED']) >= num_rows * num_courses:
+                return True
+            Population.stop_fitness_pool()
+        if not H.can_fork("FITNESS_WORKERS"):
+            GD['FITNESS_WORKERS'] = 0
+            return False
+
+        num_rows = max(num_rows, GD['POPULATION'])
+        shared = {}
+        for code in ['FIT_ROOM', 'FIT_KILL', 'FIT_INSTRUCTOR', 'FIT_TIME']:
+            shared[code] = multiprocessing.RawArray(GD[code].typecode,
+                                                    GD[code])
+        shared['GENOMES'] = \
+            multiprocessing.RawArray('h', num_rows * 3 * num_courses)
+        shared['PENALTIES'] = \
+            multiprocessing.RawArray('l', num_rows * num_courses)
+        shared['KILLED'] = \
+            multiprocessing.RawArray('b', num_rows * num_courses)
+        GD['FITNESS_SHARED'] = shared
+        H.say("LOG", "Starting ", GD['FITNESS_WORKERS'], " fitness workers")
+        context = multiprocessing.get_context('fork')
+        GD['FITNESS_POOL'] = context.Pool(GD['FITNESS_WORKERS'])
+        return True
+
+    @staticmethod
+    def stop_fitness_pool():
+        """
+        Helper to shut down the fitness workers, if any were started.
+
+        :return:
+        """
+        if GD['FITNESS_POOL'] is not None:
+            GD['FITNESS_POOL'].close()
+            GD['FITNESS_POOL'].join()
+            GD['FITNESS_POOL'] = None
+            GD['FITNESS_SHARED'] = {}
+
+    @staticmethod
+    def evaluate_parallel(solutions):
+        """
+        Helper to fitness(), scores the penalties of the given solutions
+        from scratch on the fitness workers, see get_penalties(). Each
+        genome is written to a row of the shared genome block and every
+        worker scores a contiguous run of rows into the shared penalty and
+        killed blocks, so the result doesn't depend on scheduling and
+        matches serial scoring exactly. Handing a row over and back costs
+        about a fifth of scoring it here.
+
+        :param solutions: list of solution keys on GD['S']
+        :return: list of penalties, in the same order
+        """
+        import itertools
+        if not Population.start_fitness_pool(len(solutions)):
+            return [H.get_penalties(GD['S'][s], GD) for s in solutions]
+        shared = GD['FITNESS_SHARED']
+        num_courses = len(GD['C_KEYS'])
+        genome_len = 3 * num_courses
+        for row, s in enumerate(solutions):
+            shared['GENOMES'][row * genome_len:(row + 1) * genome_len] = \
+                GD['S'][s]
+        num_rows = len(solutions)
+        chunk = -(-num_rows // GD['FITNESS_WORKERS'])
+        bounds = [(start, min(start + chunk, num_rows))
+                  for start in range(0, num_rows, chunk)]
+        GD['FITNESS_POOL'].map(Population.evaluate_rows, bounds)
+        states = []
+        for row in range(num_rows):
+            first = row * num_courses
+            penalties = array.array(
+                'l', shared['PENALTIES'][first:first + num_courses])
+            killed = set(itertools.compress(
+                range(num_courses),
+                shared['KILLED'][first:first + num_courses]))
+            states.append([sum(penalties), killed, penalties])
+        return states
+
+    @staticmethod
+    def evaluate_rows(bounds):
+        """
+        Fitness worker, scores rows start to stop - 1 of the shared genome
+        block into the shared penalty and killed blocks, see
+        evaluate_parallel().
+
+        :param bounds: (start, stop)
+        :return:
+        """
+        start, stop = bounds
+        shared = GD['FITNESS_SHARED']
+        num_courses = len(GD['C_KEYS'])
+        genome_len = 3 * num_courses
+        for row in range(start, stop):
+            genome = shared['GENOMES'][row * genome_len:(row + 1) * genome_len]
+            total, killed, penalties = H.get_penalties(genome, shared)
+            first = row * num_courses
+            shared['PENALTIES'][first:first + num_courses] = penalties
+            shared['KILLED'][first:first + num_courses] = \
+                [course in killed for course in range(num_courses)]
+
+    @staticmethod
+    def start_evaluation_server():
+        """
+        Helper to evaluate_remote(), listens for evaluation workers on
+        EVALUATION_HOST:EVALUATION_PORT and starts EVALUATION_LOCAL_WORKERS
+        of them on this machine. Workers elsewhere are started with
+
+        python genetic_scheduler.py --worker <host>:<port>
+
+        from a copy of the project with the same inputs, or with access to
+        the same PROBLEM_CACHE_DIR.
+
+        :return:
+        """
+        import socket
+        import subprocess
+        # Workers load the compiled problem by its hash
+        problem_id = InputProcessor.problem_hash()
+        cache_file = InputProcessor.problem_cache_file(problem_id)
+        if not os.path.isfile(cache_file):
+            InputProcessor.save_problem_cache(cache_file)
+        GD['EVALUATION_PROBLEM'] = problem_id
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((GD['EVALUATION_HOST'], GD['EVALUATION_PORT']))
+        server.listen(16)
+        GD['EVALUATION_SERVER'] = server
+        host, port = server.getsockname()[:2]
+        H.say("INFO", "Evaluation coordinator listening on ", host, ":",
+              port)
+        for i in range(GD['EVALUATION_LOCAL_WORKERS']):
+            GD['EVALUATION_PROCESSES'].append(subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__),
+                 '--worker', host + ':' + str(port)]
+            ))
+
+    @staticmethod
+    def stop_evaluation_server():
+        """
+        Helper to tell the evaluation workers to exit and close the
+        coordinator, if it was started.
+
+        :return:
+        """
+        import subprocess
+        for conn in GD['EVALUATION_WORKERS']:
+            try:
+                H.send_message(conn, {'type': 'stop'})
+            except OSError:
+                pass
+            conn.close()
+        GD['EVALUATION_WORKERS'] = []
+        # Local workers that were dropped may be hung
+        for p in GD['EVALUATION_PROCESSES']:
+            try:
+                p.wait(GD['EVALUATION_TIMEOUT'])
+            except subprocess.TimeoutExpired:
+                p.kill()
+                p.wait()
+        GD['EVALUATION_PROCESSES'] = []
+        if GD['EVALUATION_SERVER'] is not None:
+            GD['EVALUATION_SERVER'].close()
+            GD['EVALUATION_SERVER'] = None
+
+    @staticmethod
+    def drop_evaluation_worker(conn, reason):
+        """
+        Helper to evaluate_remote(), forgets a worker that failed.
+
+        :param conn: socket of the worker
+        :param reason: for the warning
+        :return:
+        """
+        H.say("WARN", "Dropping an evaluation worker, ", reason)
+        GD['EVALUATION_WORKERS'].remove(conn)
+        conn.close()
+
+    @staticmethod
+    def evaluate_remote(solutions):
+        """
+        Helper to fitness(), the coordinator side of TCP evaluation, scores
+        the penalties of the given solutions from scratch, see
+        get_penalties(). fitness() only sends solutions without running
+        penalties, the others are cheaper to score here. The genomes go
+        out in batches of EVALUATION_BATCH_SIZE to whichever worker is
+        idle, along with the problem hash, and the penalties come back in
+        the same order. A batch whose worker disconnects, reports an error
+        or doesn't answer within EVALUATION_TIMEOUT seconds goes back on
+        the queue for another worker. Once every worker was dropped, or
+        none connected for EVALUATION_TIMEOUT seconds, the batches left
+        are scored here.
+
+        :param solutions: list of solution keys on GD['S']
+        :return: list of penalties, in the same order
+        """
+        import select
+        import time
+        if GD['EVALUATION_SERVER'] is None:
+            Population.start_evaluation_server()
+        server = GD['EVALUATION_SERVER']
+        size = GD['EVALUATION_BATCH_SIZE']
+        num_courses = len(GD['C_KEYS'])
+        states = [None] * len(solutions)
+        queued = collections.deque(range(0, len(solutions), size))
+        remaining = len(queued)
+        busy = {}  # worker socket -> (batch start, time sent)
+        idle = list(GD['EVALUATION_WORKERS'])
+        dropped = False
+        last_progress = time.time()
+        while remaining:
+            while queued and idle:
+                conn = idle.pop()
+                start = queued.popleft()
+                batch = solutions[start:start + size]
+                header = {'type': 'batch',
+                          'problem': GD['EVALUATION_PROBLEM'],
+                          'rows': len(batch),
+                          'byteorder': sys.byteorder}
+                try:
+                    H.send_message(conn, header, b''.join(
+                        GD['S'][s].tobytes() for s in batch))
+                except OSError as e:
+                    queued.appendleft(start)
+                    Population.drop_evaluation_worker(conn, e)
+                    dropped = True
+                    continue
+                busy[conn] = (start, time.time())
+
+            readable = select.select([server] + list(busy), [], [], 1.0)[0]
+            for sock in readable:
+                if sock is server:
+                    conn, address = server.accept()
+                    H.say("LOG", "Evaluation worker joined from ", address)
+                    GD['EVALUATION_WORKERS'].append(conn)
+                    idle.append(conn)
+                    continue
+                start, sent = busy.pop(sock)
+                header, payload = H.receive_message(sock)
+                if header is None:
+                    queued.appendleft(start)
+                    Population.drop_evaluation_worker(
+                        sock, "connection lost, batch requeued")
+                    dropped = True
+                elif header['type'] == 'error':
+                    queued.appendleft(start)
+                    Population.drop_evaluation_worker(
+                        sock, "it failed: " + str(header['message']) +
+                        ", batch requeued")
+                    dropped = True
+                else:
+                    penalties = array.array('q')
+                    penalties.frombytes(payload)
+                    if header['byteorder'] != sys.byteorder:
+                        penalties.byteswap()
+                    for row, killed in enumerate(header['killed']):
+                        row_penalties = array.array('l', penalties[
+                            row * num_courses:(row + 1) * num_courses])
+                        states[start + row] = [sum(row_penalties),
+                                               set(killed), row_penalties]
+                    remaining -= 1
+                    last_progress = time.time()
+                    idle.append(sock)
+
+            now = time.time()
+            for conn, (start, sent) in list(busy.items()):
+                if now - sent > GD['EVALUATION_TIMEOUT']:
+                    del busy[conn]
+                    queued.appendleft(start)
+                    Population.drop_evaluation_worker(
+                        conn, "timed out, batch requeued")
+                    dropped = True
+            if not GD['EVALUATION_WORKERS'] and \
+                    (dropped or now - last_progress > GD['EVALUATION_TIMEOUT']):
+                H.say("WARN", "No evaluation workers left, scoring ",
+                      len(queued), " batches here")
+                while queued:
+                    start = queued.popleft()
+                    states[start:start + size] = [
+                        H.get_penalties(GD['S'][s], GD)
+                        for s in solutions[start:start + size]]
+                    remaining -= 1
+        return states
+
+    @staticmethod
+    def run_worker(address):
+        """
+        Evaluation worker, connects to the coordinator at host:port and
+        scores the penalties of the batches of genomes it sends until told
+        to stop. Each reply holds the killed course IDs of every genome and
+        its per-course penalties as 64 bit integers, see evaluate_remote(),
+        so the coordinator keeps them as running penalties. The
+        compiled problem named by the batch is loaded once from
+        PROBLEM_CACHE_DIR, or built from the inputs here if its hash
+        matches. A problem name that isn't a SHA-1 hash, see
+        problem_hash(), is refused, it would name a file anywhere.
+
+        :param address: host:port of the coordinator
+        :return:
+        """
+        import re
+        import socket
+        import time
+        host, port = address.rsplit(':', 1)
+        deadline = time.time() + GD['EVALUATION_TIMEOUT']
+        while True:
+            try:
+                sock = socket.create_connection((host, int(port)))
+                break
+            except OSError as e:
+                if time.time() > deadline:
+                    H.say("ERROR", "Can't reach coordinator ", address,
+                          ", ", e)
+                time.sleep(0.5)
+
+        problem_id = None
+        genome_len = 0
+        while True:
+            header, payload = H.receive_message(sock)
+            if header is None or header['type'] == 'stop':
+                break
+            if header['problem'] != problem_id:
+                if not isinstance(header['problem'], str) or \
+                        not re.fullmatch('[0-9a-f]{40}', header['problem']):
+                    H.send_message(sock, {
+                        'type': 'error',
+                        'message': "worker refused problem name " +
+                                   repr(header['problem'])})
+                    break
+                cache_file = InputProcessor.problem_cache_file(
+                    header['problem'])
+                if not InputProcessor.load_problem_cache(cache_file):
+                    InputProcessor.build_problem()
+                    if InputProcessor.problem_hash() != header['problem']:
+                        H.send_message(sock, {
+                            'type': 'error',
+                            'message': "worker inputs don't match problem "
+                                       + header['problem']})
+                        break
+                problem_id = header['problem']
+                genome_len = 3 * len(GD['C_KEYS'])
+            genomes = array.array('h')
+            genomes.frombytes(payload)
+            if header['byteorder'] != sys.byteorder:
+                genomes.byteswap()
+            penalties = array.array('q')
+            killed = []
+            for row in range(header['rows']):
+                state = H.get_penalties(
+                    genomes[row * genome_len:(row + 1) * genome_len], GD)
+                penalties.extend(state[2].tolist())
+                killed.append(sorted(state[1]))
+            H.send_message(sock, {'type': 'penalties',
+                                  'killed': killed,
+                                  'byteorder': sys.byteorder},
+                           penalties.tobytes())
+        sock.close()
+
+    @staticmethod
+    def evolve(island=None, inboxes=None):
+        """
+        The generation loop, runs NUM_ITERATIONS rounds of fitness, cull,
+        crossover, elitism and mutation on the population, or fewer when
+        check_convergence() says the run is done. Islands also migrate
+        every MIGRATION_INTERVAL generations, see migrate(), and always run
+        all NUM_ITERATIONS since the others wait on their migrants.
+
+        :param island: island number, None outside of island mode
+        :param inboxes: migration queues of all islands
+        :return:
+        """
+        iteration_count = 0
+        GD['FITNESS_HISTORY'] = []
+        GD['CURRENT_MUTATION_RATE'] = GD['MUTATION_RATE']
+        while iteration_count < GD['NUM_ITERATIONS']:
+            H.say("INFO", "Iteration: ", iteration_count)
+            Population.fitness()
+            if inboxes is None:
+                reason = Population.check_convergence()
+                if reason is not None:
+                    H.say("INFO", "Stopping early, ", reason)
+                    break
+            if inboxes is not None and \
+                    (iteration_count + 1) % GD['MIGRATION_INTERVAL'] == 0:
+                Population.migrate(island, inboxes)
+            Population.memetic_search()
+            Population.cull_population()
+            Population.crossover()
+            Population.keep_elite()
+            # Don't run mutation on last iteration
+            if iteration_count < GD['NUM_ITERATIONS'] - 1:
+                # idea: mutate only every nth iteration??
+                Population.mutate()
+            Population.adapt_operators()
+            iteration_count += 1
+        GD['ITERATIONS_RUN'] = iteration_count
+        Population.report_operators()
+
+    @staticmethod
+    def check_convergence():
         """
-        H.say("INFO", "Generating set of random solutions...")
-        # Initialize the resources calendar
-        Population.initialize_resources()
-        Population.pre_order_courses()
+        Stopping criteria for evolve(), from the best and average fitness
+        fitness() records for each generation in GD['FITNESS_HISTORY']:
 
-        # Iterate over all course constraints and make assignments so that
-        # the constraints reserve their place in the solution.
-        rs_counter = 0
-        num_forces = 0
-        # Loop over all solutions.
-        while rs_counter < GD['POPULATION']:
-            H.say("INFO", "creating solution [", rs_counter, "]")
-            # First loop over all course constraints
-            for course in GD['CO']:
-                course_name = GD['C'][course]['Class Subject + Nbr']
-                course_section = GD['C'][course]['*Section']
-                instructor = ""
-                room = ""
-                time = ""
-                # Could save this loop by making 'cc' key a code, not integer
-                # to support direct look-up.
-                cc_key = course_name[0] + "_" + course_section[0]
-                c1 = ('Course' in GD['CC'][cc_key])
-                c2 = ('Section' in GD['CC'][cc_key])
-                if c1 and c2:
-                    H.say("DBG", "found constraint(s) for: ",
-                          course_name, " section ", course_section)
-                    if 'Time Slot' in GD['CC'][cc_key]:
-                        time = GD['CC'][cc_key]['Time Slot']
-                        GD['S'][rs_counter][course]['TimeForced'] = True
-                        H.say("DBG", "force time slot: ", time)
-                        # This will get forced assignments.
-                        instructor = H.get_resource(rs_counter,
-                                                    course,
-                                                    time,
-                                                    'I',
-                                                    cc_key
-                                                    )
-                        if instructor == "":
-                            H.say("ERROR", "Instructor force error")
-                        # This will get forced assignments.
-                        room = H.get_resource(rs_counter,
-                                              course,
-                                              time,
-                                              'R',
-                                              cc_key
-                                              )
-                        if room == "":
-                            H.say("ERROR", "Room force error")
-                            break
-                    # This is the case where no time slot is forced.
-                    else:
-                        time_valid = False
-                        time_try = 0
-                        max_tries = len(GD['T'])
-                        while not time_valid:
-                            # if not, will set false during while
-                            time_valid = True
-                            time = H.get_time_slot(rs_counter, course)
-                            time_try += 1
-                            H.say("DBG", " trying time: ", time)
-                            instructor = H.get_resource(rs_counter,
-                                                        course,
-                                                        time,
-                                                        'I',
-                                                        cc_key
-                                                        )
-                            if instructor == "":
-                                time_valid = False
-                            room = H.get_resource(rs_counter,
-                                                  course,
-                                                  time,
-                                                  'R',
-                                                  cc_key
-                                                  )
-                            if room == "":
-                                time_valid = False
-                            if time_try == max_tries:
-                                # Exit with message
-                                H.help(1, course,
-                                       course_name, course_section)
+        STOP_TIME_LIMIT = the search ran this many seconds, see Main
+        STOP_TARGET_SCORE = the best solution reached this score
+        STOP_STAGNATION = the best solution found so far didn't improve in
+                          the last STOP_STAGNATION generations, or by less
+                          than STOP_MIN_IMPROVEMENT_PCT percent
 
-                # Make the actual assignment
-                if not (instructor == "") and not (room == ""):
-                    H.say("DBG", "making forced assignments for ",
-                          instructor, ":", room, ":", time)
-                    H.make_assignment(rs_counter,
-                                      course,
-                                      instructor,
-                                      time,
-                                      "instructor"
-                                      )
-                    H.make_assignment(rs_counter,
-                                      course,
-                                      room,
-                                      time,
-                                      "room"
-                                      )
-                    num_forces += 1
-                    GD['S'][rs_counter][course]['CourseAssigned'] = True
-                else:
-                    GD['S'][rs_counter][course]['CourseAssigned'] = False
-            H.say("DBG", "Made ", num_forces, " forced assignments")
-
-            # Second loop over all remaining unassigned courses
-            for course in GD['CO']:
-                course_name = GD['C'][course]['Class Subject + Nbr']
-                course_section = GD['C'][course]['*Section']
-                instructor = ""
-                room = ""
-                time = ""
-                if not GD['S'][rs_counter][course]['CourseAssigned']:
-                    H.say("DBG", "\nRandomly assigning course: ", course,
-                          " : ", course_name, " : ", course_section)
-                    time_valid = False
-                    time_try = 0
-                    max_tries = len(GD['T'])
-                    while not time_valid:
-                        # if not, will set false during while
-                        time_valid = True
-                        time = H.get_time_slot(rs_counter, course)
-                        time_try += 1
-                        H.say("DBG", " trying time: ", time)
-                        instructor = H.get_resource(rs_counter,
-                                                    course,
-                                                    time,
-                                                    'I',
-                                                    ""
-                                                    )
-                        if instructor == "":
-                            time_valid = False
-                        room = H.get_resource(rs_counter,
-                                              course,
-                                              time,
-                                              'R',
-                                              ""
-                                              )
-                        if room == "":
-                            time_valid = False
-                        if time_try == max_tries:
-                            # Exit with message
-                            H.help(1, course,
-                                   course_name, course_section)
-                    # Make the actual assignment
-                    if not (instructor == "") and not (room == ""):
-                        H.make_assignment(rs_counter,
-                                          course,
-                                          instructor,
-                                          time,
-                                          "instructor"
-                                          )
-                        H.make_assignment(rs_counter,
-                                          course,
-                                          room,
-                                          time,
-                                          "room"
-                                          )
-                        GD['S'][rs_counter][course]['CourseAssigned'] = True
+        :return: reason to stop, None to carry on
+        """
+        import time
+        limit = GD['STOP_TIME_LIMIT']
+        if limit is not None and time.time() - GD['START_TIME'] >= limit:
+            return "used up the time limit of " + str(limit) + " seconds"
+        history = GD['FITNESS_HISTORY']
+        if not history:
+            return None
+        best = max(high for high, avg in history)
+        avg = history[-1][1]
+        target = GD['STOP_TARGET_SCORE']
+        if target is not None and best >= target:
+            return ("reached the target score " + str(target) +
+                    " with " + str(best) + ", average " + str(avg))
+
+        window = GD['STOP_STAGNATION']
+        if window > 0 and len(history) > window:
+            before = max(high for high, avg in history[:-window])
+            gain = best - before
+            if gain <= 0:
+                return ("no better solution than " + str(best) + " in " +
+                        str(window) + " generations, average " + str(avg))
+            if before > 0 and \
+                    100 * gain / before < GD['STOP_MIN_IMPROVEMENT_PCT']:
+                return ("best improved by only " +
+                        str(round(100 * gain / before, 2)) + "% to " +
+                        str(best) + " in " + str(window) +
+                        " generations, average " + str(avg))
+        return None
 
-                    else:
-                        # Exit with message
-                        H.help(2, course, instructor, room,
-                               course_name, course_section)
-            rs_counter += 1
+    @staticmethod
+    def memetic_search():
+        """
+        Memetic step of evolve(), hill climbs the best MEMETIC_PCT percent
+        of the population with local_search() right before selection,
+        sharing MEMETIC_BUDGET tried moves between them. The climbed
+        solutions are rescored on 'F', so cull_population() picks by
+        their new scores, and offered to the elite archive.
 
-        H.say("INFO", "Done, generated ", rs_counter, " solutions.")
+        :return:
+        """
+        import heapq
+        count = int(len(GD['S']) * GD['MEMETIC_PCT'] / 100)
+        if count < 1 or GD['MEMETIC_BUDGET'] < 1:
+            return
+        top = heapq.nlargest(count, GD['S'],
+                             key=lambda s: GD['F'][s]['fitness'])
+        kept = 0
+        gain = 0
+        for i, s in enumerate(top):
+            budget = GD['MEMETIC_BUDGET'] // count + \
+                (i < GD['MEMETIC_BUDGET'] % count)
+            kept += Population.local_search(s, budget)
+            score = Population.score_penalties(GD['PT'][s])
+            gain += score - GD['F'][s]['fitness']
+            GD['F'][s]['fitness'] = score
+        Population.update_elite({})
+        H.say("LOG", "Local search kept ", kept, " of ",
+              GD['MEMETIC_BUDGET'], " moves on ", count,
+              " solutions, gaining ", gain, " points")
 
-    # Method to check feasibility of a solution
-    # Might be able to skip this one if assignments are made as feasible
     @staticmethod
-    def check_feasibility(hash_key, entry):
-        H.say("DBG", "Checking feasibility...")
-        for c in GD[hash_key][entry]:
-            print(c)
+    def local_search(solution, budget):
+        """
+        Helper to memetic_search(), first-improvement hill climbing on one
+        solution. Each try is a random move of a random course:
+
+        - to a free room of its domain at the same time slot
+        - to a time slot of its domain where its room and instructor are
+          free, see move_element()
+        - a swap of rooms or time slots with another course, see
+          swap_elements()
+
+        Moves are checked against the RT/IT calendars, so the solution
+        stays feasible, and a move that doesn't raise the score is undone
+        right away.
+
+        :param solution: number key for the solution on GD['S'] dict
+        :param budget: number of moves to try
+        :return: number of moves kept
+        """
+        score = Population.score_penalties(GD['PT'][solution])
+        kept = 0
+        for i in range(budget):
+            move = Population.random_move(solution)
+            new_score = score
+            if move is not None:
+                new_score = Population.score_penalties(GD['PT'][solution])
+            Population.credit_operator('LOCAL_SEARCH', score, new_score)
+            if new_score > score:
+                score = new_score
+                kept += 1
+            elif move is not None:
+                Population.undo_move(solution, move)
+        return kept
 
-    # Fitness function
     @staticmethod
-    def fitness():
+    def random_move(solution):
         """
-        Method for evaluating the fitness of a given solution
-        creates GD['F'] dict with the number of the solution as the key
-        and the fitness score as a value, this makes it easy to traverse
-        the solutions based on fitness later
+        Helper to local_search() and Annealing.run(), makes a random move
+        of a random course, one of the moves local_search() lists. Moves
+        that are forced, outside the course domain or that would double-book
+        a resource aren't made.
 
-        Scratch pad of ideas
-        --------------------
-        Fitness parameter hash details (could have multiple ways to configure)
-        - professor proximity of chosen room to department
-        - course proximity of chosen room to department
-        - what days professor teaches
-        - penalty for time of day, but a light penalty
-        - class/prereq
-        - class/coreg
-        - wasted capacity in rooms
+        :param solution: number key for the solution on GD['S'] dict
+        :return: (element type, course ID, element it left, other course ID
+                 of a swap or -1), None if nothing moved
+        """
+        import random
+        genome = GD['S'][solution]
+        num_courses = len(GD['C_KEYS'])
+        course = random.randrange(num_courses)
+        move = random.randrange(3)
+        other = -1
+        if move == 0:
+            element_type = 'Facility ID'
+            time = genome[GD['G_TIME'] + course]
+            free = GD['RF'][solution][time] & GD['C_R_MASK'][course]
+            original = genome[GD['G_ROOM'] + course]
+            moved = free and H.move_element(solution, course, element_type,
+                                            H.get_random_bit(free))
+        elif move == 1:
+            element_type = 'Time Slot'
+            original = genome[GD['G_TIME'] + course]
+            moved = H.move_element(solution, course, element_type,
+                                   random.choice(GD['C_TIMES'][course]))
+        else:
+            element_type = random.choice(['Facility ID', 'Time Slot'])
+            other = random.randrange(num_courses)
+            original = genome[H.get_gene(element_type) + course]
+            moved = H.swap_elements(solution, course, other, element_type)
+        if not moved:
+            return None
+        return element_type, course, original, other
 
-        - degree progression (need 2 spreadsheets that don't exist)
-          first one has class/prereq (this means you can teach)
-          another one has class/coreq
-        - number of classes taught by professor (hard constraint)
-        - no room/date/time/instructor conflicts (depends on how detailed
-          the solution generator is)
-        - professor workload (like how many people a class has,
-          how many courses professor teaches, etc)
+    @staticmethod
+    def undo_move(solution, move):
+        """
+        Helper to take back a move of random_move(). The elements it
+        frees are the ones the move took, so this can only fail on a bug.
+        The domain isn't checked, a course can have an element outside its
+        domain from the fallback of construct_solution() and has to be
+        able to get it back.
 
-        Other ideas:
-        - departure from a previous schedule/solution?
-        - TODO - keep track of penalty metrics, a way to tell the user which
-          penalties are being imposed the most? Might help tailor constraints
-          with that info
+        :param solution: number key for the solution on GD['S'] dict
+        :param move: what random_move() returned
         :return:
         """
-        H.say("LOG", "Evaluating fitness...")
-        total_fitness = 0
-        high_fitness = 0
-        high_fitness_index = 0
-        for s in GD['S']:
-            score = GD['HIGH_SCORE']
-            for c in GD['S'][s]:
-                # set some vars that might get used multiple times
-                if len(GD['S'][s][c]['Facility ID']) == 1:
-                    room = GD['S'][s][c]['Facility ID'][0]
-                else:
-                    room = GD['S'][s][c]['Facility ID']
-                capacity = GD['S'][s][c]['Enrollment Cap'][0]
+        element_type, course, original, other = move
+        if other != -1:
+            undone = H.swap_elements(solution, course, other, element_type,
+                                     False)
+        else:
+            undone = H.move_element(solution, course, element_type,
+                                    original, False)
+        if not undone:
+            H.say("ERROR", "Unable to undo the ", element_type, " move of ",
+                  GD['C_KEYS'][course], " in solution ", solution)
 
-                # instructor proximity check = 'Instructor Proximity'
-                if GD['S'][s][c]['Instructor Building'] \
-                        != GD['S'][s][c]['Building']:
-                    penalty = GD['FC']['Instructor Proximity']['Penalty']
-                    score -= int(penalty)
+    @staticmethod
+    def get_ranking():
+        """
+        Helper to get the solution keys sorted by fitness, best first. Ties
+        keep the order they were scored in.
 
-                # course proximity = 'Room Proximity'
-                # TODO: fix this, Unit is list, building string, values
-                # won't equal anyway
-                if GD['S'][s][c]['Unit'] != GD['S'][s][c]['Building']:
-                    penalty = GD['FC']['Room Proximity']['Penalty']
-                    score -= int(penalty)
+        :return: list of solution keys
+        """
+        return [s for s, f in sorted(
+            ((s, GD['F'][s]['fitness']) for s in GD['S']),
+            key=operator.itemgetter(1),
+            reverse=True
+        )]
 
-                # time of day = 'Time of day'
-                if 'Start Time' not in GD['S'][s][c]:
-                    print("DBG TODO REMOVE")
-                start_time = H.get_time(GD['S'][s][c]['Start Time'])
-                if start_time < 900 or start_time > 1700:
-                    penalty = GD['FC']['Room Proximity']['Penalty']
-                    score -= int(penalty)
+    @staticmethod
+    def load_solution(solution, genome, score=True):
+        """
+        Helper to store a genome from another population as a solution,
+        books its calendars and scores its penalties from scratch.
 
-                # class taught in same semester as prereq = 'Prereq'
+        :param solution: number key for the solution on GD['S'] dict
+        :param genome: genome array
+        :param score: False to leave the penalties to the next fitness(),
+                      nothing may move the solution before that
+        :return:
+        """
+        H.initialize_calendars(solution)
+        GD['S'][solution] = array.array('h', genome)
+        for course in range(len(GD['C_KEYS'])):
+            H.manage_course(solution, course, "book")
+        if score:
+            H.initialize_penalties(solution)
 
-                # wasted capacity in rooms = 'Wasted Capacity'
-                room_capacity = GD['RC'][room]['Capacity']
-                room_util = (1 - (int(capacity)/int(room_capacity)))*100
-                # kill the solution if the room isn't big enough
-                if room_util > 100:
-                    score = 0
-                # TODO: Also kill solutions that waste way too much
-#                if room_util < 5:
-#                    score = 0
-                else:
-                    if room_util > GD['ROOM_CAPACITY_WASTE_THRESHOLD_PCT']:
-                        penalty = GD['FC']['Wasted Capacity']['Penalty']
-                        score -= int(penalty)
+    @staticmethod
+    def get_migration_targets(island):
+        """
+        Helper to get the islands an island sends migrants to under
+        MIGRATION_TOPOLOGY:
+        RING = the next island, the last one sends to the first
+        FULL = every other island
 
-            # instructor days taught = 'Instructor Days Taught'
-            # Simple version of check is to just count number of days
-            # instructed and add a penalty for each of them
-#            for i in GD['I']:
+        :param island: island number
+        :return: list of island numbers
+        """
+        if GD['MIGRATION_TOPOLOGY'] == "RING":
+            return [(island + 1) % GD['ISLANDS']]
+        elif GD['MIGRATION_TOPOLOGY'] == "FULL":
+            return [i for i in range(GD['ISLANDS']) if i != island]
+        H.say("ERROR", "Unsupported MIGRATION_TOPOLOGY: ",
+              GD['MIGRATION_TOPOLOGY'])
 
-            # instructor workload = 'Instructor Workload'
-            # count total number of students taught
-            workload = 0
+    @staticmethod
+    def migrate(island, inboxes):
+        """
+        Send copies of the top MIGRATION_SIZE solutions of this island to
+        its targets, then wait for the migrants of every island that sends
+        here and let them replace the worst solutions. Migrants are taken
+        in island order, so a seeded run stays repeatable.
 
-            H.say("VERBOSE", "Score for solution ", s, ": ", score)
-            # Store the key of the solution and it's fitness score on the
-            # 'F' dict so that they can be pulled off in sorted order
-            GD['F'][s]['fitness'] = score
-            total_fitness += score
-            if score > high_fitness:
-                high_fitness = max(score, high_fitness)
-                high_fitness_index = s
-        avg_fitness = round(total_fitness / len(GD['S']), 2)
-        GD['HIGH_FITNESS_INDEX'] = high_fitness_index
-        H.say("DBG", "HFI: ", GD['HIGH_FITNESS_INDEX'])
+        :param island: island number
+        :param inboxes: migration queues of all islands
+        :return:
+        """
+        ranking = Population.get_ranking()
+        migrants = [GD['S'][s] for s in ranking[:GD['MIGRATION_SIZE']]]
+        for target in Population.get_migration_targets(island):
+            inboxes[target].put((island, migrants))
+
+        sources = [i for i in range(GD['ISLANDS'])
+                   if island in Population.get_migration_targets(i)]
+        arrivals = sorted(inboxes[island].get() for i in sources)
+        worst = list(reversed(ranking))
+        replaced = 0
+        for source, genomes in arrivals:
+            for genome in genomes:
+                if replaced == len(worst):
+                    break
+                s = worst[replaced]
+                Population.load_solution(s, genome)
+                GD['F'][s]['fitness'] = \
+                    Population.score_penalties(GD['PT'][s])
+                replaced += 1
+        H.say("LOG", "Island ", island, " took in ", replaced, " migrants")
 
-        H.say("INFO", "Average fitness: ", avg_fitness,
-              " \n                 High: ", high_fitness)
+    @staticmethod
+    def run_islands():
+        """
+        Island mode: ISLANDS sub-populations of POPULATION / ISLANDS each
+        evolve in their own forked process, seeded RANDOM_SEED + island
+        number, and swap their best solutions along MIGRATION_TOPOLOGY.
+        When they finish, the best NUM_SOLUTIONS_TO_RETURN of each island
+        are merged onto GD['S'] for the final ranking.
+
+        :return:
+        """
+        import multiprocessing
+        import queue
+        import random
+        import sys
+        num_islands = GD['ISLANDS']
+        if GD['POPULATION'] // num_islands < 4:
+            H.say("ERROR", "POPULATION of ", GD['POPULATION'],
+                  " is too small for ", num_islands, " islands")
+        # crossover() needs two different parents on every island
+        if GD['CULL_SURVIVORS'] // num_islands < 2:
+            H.say("ERROR", "CULL_SURVIVORS of ", GD['CULL_SURVIVORS'],
+                  " is too small for ", num_islands, " islands")
+        Population.get_migration_targets(0)  # check the topology
+        base_seed = GD['RANDOM_SEED']
+        if base_seed is None:
+            base_seed = random.randrange(2 ** 31)
+        H.say("INFO", "Evolving ", num_islands, " islands, ",
+              GD['MIGRATION_TOPOLOGY'], " migration...")
+
+        context = multiprocessing.get_context('fork')
+        inboxes = [context.Queue() for i in range(num_islands)]
+        results = context.Queue()
+        # Anything still buffered would be written again by every island
+        sys.stdout.flush()
+        GD['LOGFILE'].flush()
+        islands = [context.Process(target=Population.run_island,
+                                   args=(i, base_seed + i, inboxes, results))
+                   for i in range(num_islands)]
+        for p in islands:
+            p.start()
+
+        received = []
+        while len(received) < num_islands:
+            try:
+                received.append(results.get(timeout=1))
+            except queue.Empty:
+                if any(p.exitcode not in (None, 0) for p in islands):
+                    for p in islands:
+                        p.terminate()
+                    H.say("ERROR", "An island exited early, see the ",
+                          "run.island*.log files")
+        for p in islands:
+            p.join()
+
+        # Merge the islands, best first
+        merged = []
+        for island, solutions, hits, misses in sorted(received):
+            H.say("INFO", "Island ", island, " best: ", solutions[0][0])
+            GD['FITNESS_CACHE_HITS'] += hits
+            GD['FITNESS_CACHE_MISSES'] += misses
+            merged.extend(solutions)
+        merged.sort(key=operator.itemgetter(0), reverse=True)
+        GD['ITERATIONS_RUN'] = GD['NUM_ITERATIONS']
+        for s, (score, genome) in enumerate(merged):
+            Population.load_solution(s, genome)
+
+    @staticmethod
+    def run_island(island, seed, inboxes, results):
+        """
+        Body of an island process, see run_islands(). Logs to its own
+        run.island<n>.log and puts (island, [(score, genome)...], cache
+        hits, cache misses) on the results queue.
+
+        :param island: island number
+        :param seed: random seed of the island
+        :param inboxes: migration queues of all islands
+        :param results: queue back to run_islands()
+        :return:
+        """
+        import random
+        random.seed(seed)
+        GD['LOGFILE'] = open('run.island' + str(island) + '.log', 'w')
+        GD['POPULATION'] //= GD['ISLANDS']
+        GD['CULL_SURVIVORS'] //= GD['ISLANDS']
+        # Islands score in their own process, the coordinator is not shared
+        GD['EVALUATION_PORT'] = None
+
+        Population.generate_random_solutions()
+        Population.evolve(island, inboxes)
+        Population.fitness()
+        Population.stop_fitness_pool()
+
+        best = Population.get_elite()[:max(GD['NUM_SOLUTIONS_TO_RETURN'], 1)]
+        results.put((island, best, GD['FITNESS_CACHE_HITS'],
+                     GD['FITNESS_CACHE_MISSES']))
+        GD['LOGFILE'].close()
 
     # Crossover
     @staticmethod
@@ -1798,19 +3959,26 @@ class Population:
         Actually, let's create 2 children per pair so that the population
         remains stable at it's max value
 
-        Techniques:
-        - swap a single random element between randomly selected parents
+        Techniques, by CROSSOVER_TYPE, see GD['CROSSOVER_OPERATORS']:
+        RANDOM_SINGLE = swap the rooms of two random courses
+        RANDOM_TIME = swap the time slots of two random courses
+        RANDOM_DOUBLE = both of the above
+        ADAPTIVE = pick one of those for each child, see pick_operator()
+
+        Each child is scored against its dominant parent, see
+        credit_operator().
 
         Notes:
         - default: instructor will not be swapped, assume that the mapping
           between course/instructor is not changeable
-        - an interesting idea might be to enable different types of techniques
-          within the same optimization. So, RANDOM_SINGLE for a while, then
-          switch it to RANDOM_DOUBLE for the remainder
+        - ADAPTIVE mixes the techniques within the same optimization,
+          favouring whichever improved on its parents lately
         :return:
         """
         # parameter-ize the technique so that it's easily changeable
         ct = GD['CROSSOVER_TYPE']
+        if ct != "ADAPTIVE" and ct not in GD['CROSSOVER_OPERATORS']:
+            H.say("ERROR", "Unknown CROSSOVER_TYPE: ", ct)
         H.say("LOG", "Performing ", ct, " crossover...")
         crossover_index = 0
         # TODO: why is this always number I expect + 1?
@@ -1839,28 +4007,148 @@ class Population:
             # Create child 1 solution - p1 is the "dominant" parent
             # instructors are always the same, don't swap if the room
             # or time is fixed by constraint.
-            H.copy_solution(p1, crossover_index, 'S_COPY', 'S')
-            p1_course = H.get_random_course('S_COPY', p1)
-            p2_course = H.get_random_course('S_COPY', p2)
-            H.say("VERBOSE", " swapping rooms for ",
-                  p1_course, ",", p2_course)
-            H.swap_elements(crossover_index, p1_course, p2_course,
-                            'Facility ID')
+            Population.make_child(ct, crossover_index, p1, p2)
             crossover_index += 1
 
             # Create child 2 solution - p2 is the "dominant" parent.
-            H.copy_solution(p2, crossover_index, 'S_COPY', 'S')
-            p1_course = H.get_random_course('S_COPY', p1)
-            p2_course = H.get_random_course('S_COPY', p2)
-            H.say("VERBOSE", " swapping rooms for ",
-                  p1_course, ",", p2_course)
-            H.swap_elements(crossover_index, p1_course, p2_course,
-                            'Facility ID')
+            Population.make_child(ct, crossover_index, p2, p1)
             crossover_index += 1
 
             pass_num += 1
         H.say("VERBOSE", "Done crossover after ", pass_num-1, " passes.")
 
+    @staticmethod
+    def make_child(ct, child, p1, p2):
+        """
+        Helper to crossover(), copies the dominant parent p1 from S_COPY to
+        the child on S and swaps the genes of the operator between two
+        random courses of it, drawn from p1 and p2.
+
+        :param ct: CROSSOVER_TYPE
+        :param child: number key for the child on GD['S'] dict
+        :param p1: number key of the dominant parent on GD['S_COPY'] dict
+        :param p2: number key of the other parent
+        :return:
+        """
+        operator_name = ct
+        if ct == "ADAPTIVE":
+            operator_name = Population.pick_operator()
+        H.copy_solution(p1, child, 'S_COPY', 'S')
+        for swap_type in GD['CROSSOVER_OPERATORS'][operator_name]:
+            p1_course = H.get_random_course('S_COPY', p1)
+            p2_course = H.get_random_course('S_COPY', p2)
+            H.say("VERBOSE", " swapping ", swap_type, " for ",
+                  p1_course, ",", p2_course)
+            H.swap_elements(child, p1_course, p2_course, swap_type)
+        if p1 in GD['PT_COPY']:
+            Population.credit_operator(
+                operator_name,
+                Population.score_penalties(GD['PT_COPY'][p1]),
+                Population.score_penalties(GD['PT'][child]))
+
+    @staticmethod
+    def pick_operator():
+        """
+        Helper to crossover(), draws a crossover operator for
+        CROSSOVER_TYPE = ADAPTIVE by probability matching: every operator
+        keeps ADAPT_MIN_PCT percent, the rest is shared in proportion to
+        the credit of each, see adapt_operators(). Without any credit yet
+        the draw is uniform.
+
+        :return: name of the operator
+        """
+        import random
+        names = list(GD['CROSSOVER_OPERATORS'])
+        floor = GD['ADAPT_MIN_PCT'] / 100
+        if not 0 <= floor * len(names) <= 1:
+            H.say("ERROR", "ADAPT_MIN_PCT must be from 0 to ",
+                  100 // len(names))
+        credit = [GD['OPERATOR_CREDIT'].get(name, 0) for name in names]
+        total = sum(credit)
+        draw = random.random()
+        for name, q in zip(names, credit):
+            share = q / total if total > 0 else 1 / len(names)
+            draw -= floor + (1 - floor * len(names)) * share
+            if draw < 0:
+                return name
+        return names[-1]
+
+    @staticmethod
+    def credit_operator(name, before, after):
+        """
+        Helper to keep score of an operator, a try counts as a success when
+        the changed solution scores higher than it did before. Callers
+        score both from the running penalties, see score_penalties(), so
+        no genome is scored from scratch for this.
+
+        :param name: crossover operator name, or MUTATION
+        :param before: score of the parent
+        :param after: score of the offspring
+        :return:
+        """
+        improved = int(after > before)
+        for table in GD['OPERATOR_TRIALS'], GD['OPERATOR_STATS']:
+            trials = table.setdefault(name, [0, 0])
+            trials[0] += 1
+            trials[1] += improved
+
+    @staticmethod
+    def adapt_operators():
+        """
+        Adaptive control, run by evolve() once per generation from the
+        success rates credit_operator() kept for the generation:
+
+        - the credit of each crossover operator becomes its success rate,
+          averaged with its old credit by ADAPT_DECAY, which steers
+          pick_operator() for CROSSOVER_TYPE = ADAPTIVE
+        - with ADAPTIVE_MUTATION, the 1/5th success rule: when more than
+          a fifth of the mutated solutions improved on what they were
+          before mutate(), the mutation rate goes up by ADAPT_FACTOR, when
+          fewer did it goes down by it, within MUTATION_RATE_MIN and
+          MUTATION_RATE_MAX. Mutation then explores while it pays off and
+          settles down as the population converges
+
+        :return:
+        """
+        decay = GD['ADAPT_DECAY']
+        for name in GD['CROSSOVER_OPERATORS']:
+            if name in GD['OPERATOR_TRIALS']:
+                tries, improved = GD['OPERATOR_TRIALS'][name]
+                GD['OPERATOR_CREDIT'][name] = \
+                    decay * GD['OPERATOR_CREDIT'].get(name, 0) + \
+                    (1 - decay) * improved / tries
+        H.say("LOG", "Operator credit: ", GD['OPERATOR_CREDIT'])
+
+        if GD['ADAPTIVE_MUTATION'] and 'MUTATION' in GD['OPERATOR_TRIALS']:
+            tries, improved = GD['OPERATOR_TRIALS']['MUTATION']
+            rate = GD['CURRENT_MUTATION_RATE']
+            if improved * 5 > tries:
+                rate *= GD['ADAPT_FACTOR']
+            elif improved * 5 < tries:
+                rate /= GD['ADAPT_FACTOR']
+            GD['CURRENT_MUTATION_RATE'] = \
+                min(max(rate, GD['MUTATION_RATE_MIN']),
+                    GD['MUTATION_RATE_MAX'])
+            H.say("LOG", "Mutation rate: ", improved, " of ", tries,
+                  " improved, now ",
+                  round(GD['CURRENT_MUTATION_RATE'], 2), "%")
+        GD['OPERATOR_TRIALS'] = {}
+
+    @staticmethod
+    def report_operators():
+        """
+        Helper to evolve(), reports how often each operator improved on
+        the solution it changed over the run.
+
+        :return:
+        """
+        for name, (tries, improved) in sorted(GD['OPERATOR_STATS'].items()):
+            H.say("INFO", name, ": ", improved, " of ", tries, " improved (",
+                  round(100 * improved / tries, 1), "%)")
+        if GD['ADAPTIVE_MUTATION']:
+            H.say("INFO", "Final mutation rate: ",
+                  round(GD['CURRENT_MUTATION_RATE'], 2), "%")
+
     # Mutation
     @staticmethod
     def mutate():
@@ -1872,6 +4160,9 @@ class Population:
           solutions elements to mutate, as opposed to uniformly mutating a
           certain percentage of each solution. This way
 
+        With ADAPTIVE_MUTATION the rate changes as the run goes, see
+        adapt_operators().
+
         Method #2: TODO for each solution, swap the same percentage of elements
 
         Ideas: what about not mutating the top solution. If we don't, then we
@@ -1891,46 +4182,40 @@ class Population:
         # be tracked. Multiply number of solutions * number of courses
         # per solution * 2 (because we are swapping only 2 possible elements
         width = len(GD['S'])
-        height = len(GD['S'][0])
+        height = len(GD['C_KEYS'])
         total_elements = width * height * 2
         num_mutated = 0
 
         # Perform the un-assignment
-        while num_mutated < (GD['MUTATION_RATE']/100) * total_elements:
-            random_s = GD['HIGH_FITNESS_INDEX']
-
-            # TODO fix this: preserve the top solution always
-            while random_s == GD['HIGH_FITNESS_INDEX']:
+        rate = GD['CURRENT_MUTATION_RATE']
+        before = {}  # score of each mutated solution before its mutations
+        while num_mutated < (rate / 100) * total_elements:
+            # Never mutate the elites, see keep_elite()
+            random_s = H.get_random_number('S')
+            while random_s in GD['ELITE_INDEXES']:
                 random_s = H.get_random_number('S')
 
             # get random element and mutate
             random_c = H.get_random_course('S', random_s)
             random_e = H.get_random_course_element()
             # TODO: verify: skip if it was assigned by forced assignment
-            if H.check_forced(random_s, random_c, random_e):
-                H.say("DBG1", "skipping mutation of forced assignment")
+            if H.check_forced(random_c, random_e):
+                H.say("DBG", "skipping mutation of forced assignment")
                 continue
 
-            # Process the mutation for random element
-            original_instructor = \
-                GD['S'][random_s][random_c]['Instructor Jan/Dana ID']
-            original_room = GD['S'][random_s][random_c]['Facility ID']
-            orig_time = GD['S'][random_s][random_c]['Time Slot']
-            element = GD['S'][random_s][random_c][random_e]
+            # Process the mutation for random element, all of these are IDs
+            genome = GD['S'][random_s]
+            if random_s not in before:
+                before[random_s] = \
+                    Population.score_penalties(GD['PT'][random_s])
+            original_instructor = genome[GD['G_INSTRUCTOR'] + random_c]
+            original_room = genome[GD['G_ROOM'] + random_c]
+            orig_time = genome[GD['G_TIME'] + random_c]
+            element = genome[H.get_gene(random_e) + random_c]
             H.say("DBG", "mutating ", element, " at s:c ", random_s, ":",
                   random_c)
-
-            # Kludge because sometimes things are a list, sometimes a string
-            if isinstance(original_room, list):
-                room = original_room[0]
-                original_room = original_room[0]
-            else:
-                room = original_room
-            if isinstance(original_instructor, list):
-                instructor = original_instructor[0]
-                original_instructor = original_instructor[0]
-            else:
-                instructor = original_instructor
+            room = original_room
+            instructor = original_instructor
 
             # Only mutate the room resource in this case.
             if "Facility ID" in random_e:
@@ -1940,9 +4225,9 @@ class Population:
                                       random_c,
                                       orig_time,
                                       'R',
-                                      ""
+                                      False
                                       )
-                if room != "":
+                if room != -1:
                     # No need to check before booking, get_resource() does that
                     H.manage_resource(r_type,
                                       random_s,
@@ -1958,6 +4243,8 @@ class Population:
                                       orig_time,
                                       "free"
                                       )
+                    genome[GD['G_ROOM'] + random_c] = room
+                    H.update_penalty(random_s, random_c)
                     num_mutated += 1
                 else:
                     H.say("DBG", "Skipping element: ", element,
@@ -1970,7 +4257,7 @@ class Population:
                 r_type = "IT"
                 time_valid = False
                 time_try = 0
-                max_tries = len(GD['T'])
+                max_tries = len(GD['T_KEYS'])
                 # Iterate over available times to try and find one that works
                 # for both instructor and room.
                 while not time_valid:
@@ -2033,6 +4320,8 @@ class Population:
                                               orig_time,
                                               "free"
                                               )
+                            genome[GD['G_TIME'] + random_c] = new_time
+                            H.update_penalty(random_s, random_c)
                             num_mutated += 1
                             break
                     time_try += 1
@@ -2044,6 +4333,12 @@ class Population:
             else:
                 H.say("ERROR", "Unrecognized type code ", random_e)
 
+        # Every mutated solution is an offspring of what it was before
+        for random_s, score in before.items():
+            Population.credit_operator(
+                'MUTATION', score,
+                Population.score_penalties(GD['PT'][random_s]))
+
         # Report stats/return to main loop
         H.say("LOG", "Mutated ", num_mutated,
               " elements of the solution")
@@ -2052,51 +4347,135 @@ class Population:
     @staticmethod
     def cull_population():
         """
-        # Culling method, this will take the top solutions one by one
-        and copy them into S_COPY dict in sorted order until the max number of
-        solutions to preserve have been copied
+        # Culling method, picks CULL_SURVIVORS solutions with select() and
+        hands them over to the S_COPY dict, best first for TRUNCATION. The
+        survivors are moved rather than copied, crossover() only reads
+        S_COPY and copies the parents and children back onto S, so the
+        rest of the population is dropped along with the old S.
         :return:
         """
-        preserved_count = 0
         H.say("LOG", "Culling population...")
-        # Get each fitness score and solution key
-        for f in GD['F']:
-            H.say("VERBOSE", "s: ", f, " fitness: ", GD['F'][f]['fitness'])
-            GD['CD'][f] = GD['F'][f]['fitness']
-        for k, v in sorted(
-                GD['CD'].items(),
-                key=operator.itemgetter(1),
-                reverse=True
-        ):
-            # copy surviving solutions into the copy dict
-            if preserved_count <= GD['CULL_SURVIVORS']:
-                H.say("DBG", "preserving ", k, ":", preserved_count)
-                H.copy_solution(k, preserved_count, 'S', 'S_COPY')
-                preserved_count += 1
-            # purge all elements from original solutions dict, and also
-            # clear the cull and fitness score dictionaries so they will be
-            # ready for next iteration
-            del GD['S'][k]
-            del GD['CD'][k]
-            del GD['F'][k]
-        H.say("LOG", "Done, preserved ", preserved_count, " of population")
+        keys = list(GD['S'])
+        scores = [GD['F'][s]['fitness'] for s in keys]
+        survivors = [keys[i] for i in
+                     Population.select(scores, GD['CULL_SURVIVORS'])]
+        H.say("DBG", "preserving ", survivors)
+        for from_db, to_db in [('S', 'S_COPY'), ('PT', 'PT_COPY')] + \
+                list(zip(GD['CALENDARS']['S'], GD['CALENDARS']['S_COPY'])):
+            GD[to_db] = {i: GD[from_db][k] for i, k in enumerate(survivors)}
+            GD[from_db] = {}
+        GD['F'].clear()
+        H.say("LOG", "Done, preserved ", len(survivors), " of population")
+
+    @staticmethod
+    def select(scores, count):
+        """
+        Selection engine, picks count solutions by the SELECTION setting.
+        Works on the scores alone and hands back positions in the list,
+        nothing is copied or sorted in full:
+
+        TRUNCATION = the count best, best first, by partial selection
+        TOURNAMENT = count tournaments of TOURNAMENT_SIZE random solutions,
+                     the best of each survives
+        RANK = count draws weighted by linear rank, the best solution is
+               RANK_PRESSURE times as likely as the median one
+
+        TOURNAMENT and RANK draw with replacement, so a good solution can
+        survive more than once.
+
+        :param scores: list of fitness scores
+        :param count: number of survivors
+        :return: list of positions in scores
+        """
+        if GD['SELECTION'] == "TRUNCATION":
+            return Population.select_truncation(scores, count)
+        elif GD['SELECTION'] == "TOURNAMENT":
+            return Population.select_tournament(scores, count)
+        elif GD['SELECTION'] == "RANK":
+            return Population.select_rank(scores, count)
+        H.say("ERROR", "Unknown SELECTION: ", GD['SELECTION'])
+
+    @staticmethod
+    def select_truncation(scores, count):
+        """
+        Helper to select(), the count best scores. Ties keep the order
+        they were scored in, like a full sort would.
+
+        :param scores: list of fitness scores
+        :param count: number of survivors
+        :return: list of positions in scores, best first
+        """
+        import heapq
+        return heapq.nlargest(count, range(len(scores)),
+                              key=scores.__getitem__)
+
+    @staticmethod
+    def select_tournament(scores, count):
+        """
+        Helper to select(), k-tournament selection with k of
+        TOURNAMENT_SIZE.
+
+        :param scores: list of fitness scores
+        :param count: number of survivors
+        :return: list of positions in scores
+        """
+        import random
+        size = GD['TOURNAMENT_SIZE']
+        if size < 1:
+            H.say("ERROR", "TOURNAMENT_SIZE must be at least 1")
+        selected = []
+        for i in range(count):
+            best = random.randrange(len(scores))
+            for j in range(size - 1):
+                entrant = random.randrange(len(scores))
+                if scores[entrant] > scores[best]:
+                    best = entrant
+            selected.append(best)
+        return selected
+
+    @staticmethod
+    def select_rank(scores, count):
+        """
+        Helper to select(), linear rank selection. The solution of rank r,
+        0 being the worst of n, has weight (2 - p) + 2 * (p - 1) * r / (n-1)
+        with p the RANK_PRESSURE, so 1.0 picks uniformly and 2.0 never
+        picks the worst.
+
+        :param scores: list of fitness scores
+        :param count: number of survivors
+        :return: list of positions in scores
+        """
+        import bisect
+        import itertools
+        import random
+        pressure = GD['RANK_PRESSURE']
+        if not 1.0 <= pressure <= 2.0:
+            H.say("ERROR", "RANK_PRESSURE must be from 1.0 to 2.0")
+        n = len(scores)
+        ranked = sorted(range(n), key=scores.__getitem__)
+        if n == 1:
+            return ranked * count
+        weights = [(2 - pressure) + 2 * (pressure - 1) * r / (n - 1)
+                   for r in range(n)]
+        cumulative = list(itertools.accumulate(weights))
+        return [ranked[bisect.bisect_right(cumulative,
+                                           random.random() * cumulative[-1])]
+                for i in range(count)]
 
     @staticmethod
     def return_population():
         """
         The big method to print all data for a solution to CSV the old
-        fashioned way, without using csv.writer
+        fashioned way, without using csv.writer. The solutions come from
+        the elite archive, best first, so the files are named by rank.
 
         :return:
         """
         import sys
         # determine which solutions to output
         solution_count = 0
-        # Get each fitness score and solution key, return highest N
-        for f in GD['F']:
-            GD['CD'][f] = GD['F'][f]['fitness']
-        for s, f in sorted(GD['CD'].items(), key=operator.itemgetter(1),
-                           reverse=True):
+        # Return highest N of the best solutions found so far
+        for s, (f, genome) in enumerate(Population.get_elite()):
             if solution_count < GD['NUM_SOLUTIONS_TO_RETURN']:
                 solution_count += 1
 
@@ -2127,7 +4506,8 @@ class Population:
                 print(file=fh)
 
                 # print the data into rows
-                for c in GD['S'][s]:
+                for c in range(len(GD['C_KEYS'])):
+                    row = Population.get_export_row(genome, c)
                     count = 0
                     for s_param in GD['S_PARAMS']:
                         count += 1
@@ -2137,10 +4517,10 @@ class Population:
                         else:
                             end_char = ','
                         # some elements are stored as lists, some are not
-                        if len(GD['S'][s][c][s_param]) == 1:
-                            element = GD['S'][s][c][s_param][0]
+                        if len(row[s_param]) == 1:
+                            element = row[s_param][0]
                         else:
-                            element = GD['S'][s][c][s_param]
+                            element = row[s_param]
                         if element.find(',') != -1:
                             element = '"' + element + '"'
                         # print the actual line
@@ -2148,6 +4528,39 @@ class Population:
                     print(file=fh)
         H.say("INFO", "Done, returned ", solution_count, " solutions.")
 
+    @staticmethod
+    def get_export_row(genome, course):
+        """
+        Helper to return_population(), turns the IDs assigned to a course
+        back into the full set of S_PARAMS for output.
+
+        :param genome: genome array of the solution
+        :param course: course ID
+        :return: dict of S_PARAMS and values, some values are lists
+        """
+        course_key = GD['C_KEYS'][course]
+        instructor = GD['I_KEYS'][genome[GD['G_INSTRUCTOR'] + course]]
+        room = GD['R_KEYS'][genome[GD['G_ROOM'] + course]]
+        time = GD['T_KEYS'][genome[GD['G_TIME'] + course]]
+        row = {}
+        # Course params
+        for c_param in GD['C_PARAMS']:
+            row[c_param] = GD['C'][course_key][c_param]
+        # Instructor params
+        for i_key in GD['I'][instructor]:
+            row[i_key] = GD['I'][instructor][i_key]
+        row['Instructor Building'] = \
+            GD['IC'][instructor]['Instructor Building']
+        # Time
+        for t_key in GD['T'][time]:
+            row[t_key] = GD['T'][time][t_key]
+        row['Time Slot'] = time
+        # Room
+        row['Facility ID'] = GD['R'][room]['Facility ID']
+        row['Building'] = GD['RC'][room]['Building']
+        row['Unit'] = GD['C'][course_key]['Unit']
+        return row
+
     @staticmethod
     def return_population_by_writer():
         """
@@ -2160,9 +4573,183 @@ class Population:
               " solutions...")
         with open('solution.csv', 'w', newline='') as f:
             writer = csv.writer(f)
-            for c in GD['S'][0]:
-                H.say("DBG1", "c: ", c, "c0: ", c[0])
-                writer.writerow(c)
+            for c in range(len(GD['C_KEYS'])):
+                course = GD['C_KEYS'][c]
+                H.say("DBG1", "c: ", course, "c0: ", course[0])
+                writer.writerow(course)
+
+
+#######################################################################
+# Simulated annealing class
+#
+# A single solution search over the same problem model as the GA: the
+# starting solution is built like any solution of the population, and
+# the moves, calendars, penalties and elite archive are the ones the
+# Population class uses.
+#######################################################################
+class Annealing:
+    global GD
+
+    @staticmethod
+    def run():
+        """
+        Simulated annealing on solution 0 of the 'S' dict. Each step makes
+        a move with Population.random_move() and keeps it if it doesn't
+        lower the score, or else with probability exp(delta / T). The
+        temperature T cools from ANNEAL_START_TEMP to ANNEAL_END_TEMP over
+        ANNEAL_ITERATIONS moves, or over STOP_TIME_LIMIT seconds if that
+        runs out first, see get_temperature().
+
+        With TABU_TENURE, a course can't go back to a room or time slot it
+        left in the last TABU_TENURE kept moves, unless that gives a new
+        best solution.
+
+        Every new best solution is offered to the elite archive, which
+        return_population() writes out like for the GA.
+
+        :return:
+        """
+        import math
+        import random
+        import time
+        solution = 0
+        H.say("INFO", "Generating the starting solution...")
+        base_seed = random.randrange(2 ** 31)
+        random.seed(H.get_solution_seed(base_seed, solution))
+        Population.generate_solution(solution)
+        random.seed(H.get_solution_seed(base_seed, "anneal"))
+
+        score = Population.score_penalties(GD['PT'][solution])
+        best = score
+        GD['F'][solution]['fitness'] = score
+        Population.update_elite({})
+        H.say("INFO", "Starting score: ", score)
+
+        start_temp = GD['ANNEAL_START_TEMP']
+        if start_temp is None:
+            start_temp = Annealing.get_start_temperature(solution)
+        steps = GD['ANNEAL_ITERATIONS']
+        limit = GD['STOP_TIME_LIMIT']
+        target = GD['STOP_TARGET_SCORE']
+        tabu = {}  # (course, element type, element) -> step it's free again
+        kept = 0
+        step = 0
+        while step < steps:
+            progress = step / steps
+            if limit is not None:
+                progress = max(progress,
+                               (time.time() - GD['START_TIME']) / limit)
+                if progress >= 1:
+                    H.say("INFO", "Stopping early, used up the time limit",
+                          " of ", limit, " seconds")
+                    break
+            if target is not None and best >= target:
+                H.say("INFO", "Stopping early, reached the target score ",
+                      target, " with ", best)
+                break
+            temp = Annealing.get_temperature(start_temp, progress)
+            if step % max(steps // 20, 1) == 0:
+                H.say("INFO", "Step: ", step, ", temperature ",
+                      round(temp, 2), ", score ", score, ", best ", best)
+            step += 1
+
+            move = Population.random_move(solution)
+            if move is None:
+                continue
+            new_score = Population.score_penalties(GD['PT'][solution])
+            delta = new_score - score
+            entered, left = Annealing.get_move_elements(solution, move)
+            is_tabu = new_score <= best and \
+                any(tabu.get(e, 0) > kept for e in entered)
+            if is_tabu or \
+                    delta < 0 and random.random() >= math.exp(delta / temp):
+                # Take the score back from the running penalties, so it
+                # can't drift from them, undo_move() exits if it fails
+                Population.undo_move(solution, move)
+                score = Population.score_penalties(GD['PT'][solution])
+                continue
+
+            # Only a move that stands makes what it left tabu
+            kept += 1
+            score = new_score
+            if GD['TABU_TENURE'] > 0:
+                for element in left:
+                    tabu[element] = kept + GD['TABU_TENURE']
+            if score > best:
+                best = score
+                GD['F'][solution]['fitness'] = score
+                Population.update_elite({})
+        GD['ITERATIONS_RUN'] = step
+        H.say("INFO", "Annealing kept ", kept, " of ", step,
+              " moves, best score ", best)
+
+    @staticmethod
+    def get_temperature(start_temp, progress):
+        """
+        Helper to run(), the cooling schedule:
+
+        GEOMETRIC = T falls by the same factor every move
+        LINEAR = T falls by the same amount every move
+
+        :param start_temp: temperature at the start
+        :param progress: fraction of the run done, 0 to 1
+        :return: temperature
+        """
+        end_temp = min(GD['ANNEAL_END_TEMP'], start_temp)
+        if end_temp <= 0:
+            H.say("ERROR", "ANNEAL_END_TEMP must be above 0")
+        if GD['ANNEAL_SCHEDULE'] == "GEOMETRIC":
+            return start_temp * (end_temp / start_temp) ** progress
+        elif GD['ANNEAL_SCHEDULE'] == "LINEAR":
+            return start_temp + (end_temp - start_temp) * progress
+        H.say("ERROR", "Unknown ANNEAL_SCHEDULE: ", GD['ANNEAL_SCHEDULE'])
+
+    @staticmethod
+    def get_start_temperature(solution):
+        """
+        Helper to run(), calibrates the start temperature so that a move
+        losing the average amount is kept half the time. The average is
+        taken over 100 sample moves, which are all taken back.
+
+        :param solution: number key for the solution on GD['S'] dict
+        :return: temperature
+        """
+        import math
+        score = Population.score_penalties(GD['PT'][solution])
+        losses = []
+        for i in range(100):
+            move = Population.random_move(solution)
+            if move is None:
+                continue
+            delta = Population.score_penalties(GD['PT'][solution]) - score
+            if delta < 0:
+                losses.append(-delta)
+            Population.undo_move(solution, move)
+        if not losses:
+            return GD['ANNEAL_END_TEMP']
+        start_temp = sum(losses) / len(losses) / math.log(2)
+        H.say("LOG", "Calibrated start temperature: ", start_temp)
+        return start_temp
+
+    @staticmethod
+    def get_move_elements(solution, move):
+        """
+        Helper to run(), the (course, element type, element) assignments a
+        move of Population.random_move() made and the ones it gave up, for
+        the tabu list.
+
+        :param solution: number key for the solution on GD['S'] dict
+        :param move: what random_move() returned
+        :return: (entered, left) lists
+        """
+        element_type, course, original, other = move
+        current = GD['S'][solution][H.get_gene(element_type) + course]
+        entered = [(course, element_type, current)]
+        left = [(course, element_type, original)]
+        if other != -1:
+            entered.append((other, element_type, original))
+            left.append((other, element_type, current))
+        return entered, left
 
 
 #######################################################################
@@ -2171,39 +4758,47 @@ class Population:
 
 
 class Main:
+    if '--worker' in sys.argv:
+        # Evaluation worker for another run, see evaluate_remote()
+        Population.run_worker(sys.argv[sys.argv.index('--worker') + 1])
+        sys.exit(0)
+    if '--engine' in sys.argv:
+        engine_arg = sys.argv.index('--engine') + 1
+        if engine_arg == len(sys.argv):
+            H.say("ERROR", "--engine needs a value, GA or ANNEALING")
+        GD['ENGINE'] = sys.argv[engine_arg]
     print("Running genetic_scheduler...")
     # Process the inputs and build the DBs
     ip = InputProcessor()
-    ip.process_input_from_solution()
-    ip.process_schedule_constraints()
-    ip.process_csv_constraints(GD['COURSE_CONSTRAINTS'], "CC_PARAMS")
-    ip.process_csv_constraints(GD['FITNESS_CONSTRAINTS'], "FC_PARAMS")
-    ip.process_csv_constraints(GD['ROOM_CONSTRAINTS'], "RC_PARAMS")
-    ip.process_csv_constraints(GD['INSTRUCTOR_CONSTRAINTS'], "IC_PARAMS")
+    ip.build_problem()
     ip.print_databases()
     ip.print_sample_assignments()
 
-    # Initial randomly generated population seed
-    population = Population()
-    population.generate_random_solutions()
-    population.fitness()
-    population.return_population()
+    if GD['RANDOM_SEED'] is not None:
+        import random
+        random.seed(GD['RANDOM_SEED'])
 
-    # Loop over the population and perform the genetic optimization
-    iteration_count = 0
-    while iteration_count < GD['NUM_ITERATIONS']:
-        H.say("INFO", "Iteration: ", iteration_count)
+    import time
+    GD['START_TIME'] = time.time()
+    population = Population()
+    use_islands = GD['ISLANDS'] > 1 and H.can_fork("ISLANDS")
+    if GD['ENGINE'] == "ANNEALING":
+        # Single solution search, see Annealing.run()
+        Annealing.run()
+    elif GD['ENGINE'] != "GA":
+        H.say("ERROR", "Unknown ENGINE: ", GD['ENGINE'])
+    elif use_islands:
+        # Evolve sub-populations in parallel and merge the best of each
+        population.run_islands()
+    else:
+        # Initial randomly generated population seed
+        population.generate_random_solutions()
         population.fitness()
-        population.cull_population()
-        population.crossover()
-        # Don't run mutation on last iteration
-        if iteration_count < GD['NUM_ITERATIONS'] - 1:
-            # idea: mutate only every nth iteration??
-            population.mutate()
-        iteration_count += 1
-    # End the loop
+
+        # Loop over the population and perform the genetic optimization
+        population.evolve()
     H.say("INFO", "Performed ",
-          GD['NUM_ITERATIONS'],
+          GD['ITERATIONS_RUN'],
           " iterations, returning top ",
           GD['NUM_SOLUTIONS_TO_RETURN'],
           " results..."
@@ -2212,14 +4807,21 @@ class Main:
     # Up next:
     # - make target around matrix_viewer
     # - improve fitness function (including check_feasible)
-    # - work on top solution preservation, culling is messing with order
     # - more crossover/mutation techniques, some research, etc.
 
     # Finish up and return, run fitness to sort, and return top N
     # ip.print_database_1level('RT')
     # ip.print_database_1level('IT')
     population.fitness()
-    #population.return_population()
+    population.stop_fitness_pool()
+    population.stop_evaluation_server()
+    population.return_population()
+    if GD['FITNESS_CACHE_MB'] > 0:
+        lookups = GD['FITNESS_CACHE_HITS'] + GD['FITNESS_CACHE_MISSES']
+        H.say("INFO", "Fitness cache: ", GD['FITNESS_CACHE_HITS'], " of ",
+              lookups, " scorings from scratch were saved (",
+              round(100 * GD['FITNESS_CACHE_HITS'] / max(lookups, 1), 1),
+              "%)")
     H.say("INFO", "Done")
 
 if __name__ == "__Main__":
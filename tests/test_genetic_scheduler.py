@@ -0,0 +1,130 @@
+#######################################################################
+# test_genetic_scheduler.py
+#
+# Tests of genetic_scheduler.py on the sample inputs in Data/, run with
+# python -m pytest or python -m unittest from the repository root.
+#######################################################################
+import os
+import random
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_scheduler():
+    """
+    Load genetic_scheduler.py without its Main class, whose body runs the
+    whole program, and build the problem from the sample inputs.
+
+    :return: namespace of the module
+    """
+    path = os.path.join(ROOT, 'genetic_scheduler.py')
+    with open(path) as source_file:
+        source = source_file.read()
+    source = source[:source.index('class Main:')]
+    namespace = {'__name__': 'genetic_scheduler', '__file__': path}
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        exec(compile(source, path, 'exec'), namespace)
+        namespace['GD']['INFO_LEVEL'] = 0
+        namespace['GD']['USE_PROBLEM_CACHE'] = False
+        namespace['InputProcessor'].build_problem()
+    finally:
+        os.chdir(cwd)
+    return namespace
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.gs = load_scheduler()
+        self.GD = self.gs['GD']
+        self.H = self.gs['H']
+        self.P = self.gs['Population']
+        random.seed(1)
+
+    def assertSolutionConsistent(self, solution):
+        """
+        The calendars and running penalties of a solution match its genome.
+        """
+        GD = self.GD
+        genome = GD['S'][solution]
+        rooms = [0] * len(GD['R_KEYS'])
+        instructors = [0] * len(GD['I_KEYS'])
+        for course in range(len(GD['C_KEYS'])):
+            time = genome[GD['G_TIME'] + course]
+            rooms[genome[GD['G_ROOM'] + course]] |= 1 << time
+            instructors[genome[GD['G_INSTRUCTOR'] + course]] |= 1 << time
+        self.assertEqual(rooms, GD['RT'][solution])
+        self.assertEqual(instructors, GD['IT'][solution])
+        total, killed, penalties = GD['PT'][solution]
+        self.H.initialize_penalties(solution)
+        self.assertEqual(total, GD['PT'][solution][0])
+        self.assertEqual(list(penalties), list(GD['PT'][solution][2]))
+
+
+class UndoMoveTest(SchedulerTest):
+    def test_undo_move_back_to_gene_outside_domain(self):
+        GD = self.GD
+        self.P.generate_solution(0)
+        genome = GD['S'][0]
+        for course in range(len(GD['C_KEYS'])):
+            if self.H.check_forced(course, 'Facility ID'):
+                continue
+            free = GD['RF'][0][genome[GD['G_TIME'] + course]]
+            outside = free & ~GD['C_R_MASK'][course]
+            inside = free & GD['C_R_MASK'][course]
+            if outside and inside:
+                break
+        else:
+            self.skipTest("no course with free rooms in and out of domain")
+        outside_room = (outside & -outside).bit_length() - 1
+        inside_room = (inside & -inside).bit_length() - 1
+
+        # A gene like the fallback of construct_solution() leaves
+        self.assertTrue(self.H.move_element(0, course, 'Facility ID',
+                                            outside_room, False))
+        move = ('Facility ID', course, outside_room, -1)
+        self.assertTrue(self.H.move_element(0, course, 'Facility ID',
+                                            inside_room))
+        self.P.undo_move(0, move)
+        self.assertEqual(genome[GD['G_ROOM'] + course], outside_room)
+        self.assertSolutionConsistent(0)
+
+
+class ConstructFallbackTest(SchedulerTest):
+    def get_capacity(self, room):
+        return int(self.GD['RC'][self.GD['R_KEYS'][room]]['Capacity'])
+
+    def test_fallback_room_fits_enrollment_cap(self):
+        GD = self.GD
+        pinned = GD['FIXED_ROOM'] | GD['FIXED_TIME']
+        for course, course_key in enumerate(GD['C_KEYS']):
+            capacity = int(GD['C'][course_key]['Enrollment Cap'][0])
+            room = GD['C_ROOMS'][course][0]
+            big_enough = [r for r in range(len(GD['R_KEYS']))
+                          if self.get_capacity(r) >= capacity]
+            if not GD['C_FIXED'][course] & pinned and \
+                    room in big_enough and len(big_enough) > 1:
+                break
+        else:
+            self.skipTest("no course with more than one room big enough")
+
+        # Saturate the domain, one room booked at every time slot
+        GD['C_ROOMS'][course] = [room]
+        GD['C_R_MASK'][course] = 1 << room
+        self.H.initialize_calendars(0)
+        for time in range(len(GD['T_KEYS'])):
+            if self.H.manage_resource('RT', 0, room, time, "check"):
+                self.H.manage_resource('RT', 0, room, time, "book")
+        assigned = [True] * len(GD['C_KEYS'])
+        assigned[course] = False
+        self.P.construct_solution(0, assigned)
+
+        placed = GD['S'][0][GD['G_ROOM'] + course]
+        self.assertNotEqual(placed, room)
+        self.assertGreaterEqual(self.get_capacity(placed), capacity)
+
+
+if __name__ == '__main__':
+    unittest.main()